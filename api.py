@@ -0,0 +1,163 @@
+import hashlib
+from datetime import datetime
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from cache import page_cache
+from deletion import delete_owners, forget_owners
+from importer import create_shows
+from models import db, Venue, Artist
+from queries import (
+    listing_facets, venue_areas, artist_list, show_list, search_results,
+    venue_detail, artist_detail, venue_version, artist_version, show_listing_filters
+)
+
+#----------------------------------------------------------------------------#
+# API JSON (/api/...)
+#----------------------------------------------------------------------------#
+
+# Memes donnees que les pages HTML, avec un ETag fort, compare en faible a If-None-Match
+# (RFC 7232) : un proxy qui compresse et affaiblit l'ETag garde ses 304.
+# Pages detail : l'ETag vient de la ligne de la venue / de l'artiste (updated_at, version,
+# compteurs de shows), lue par cle primaire ; si If-None-Match correspond, on repond 304
+# sans charger les shows ni serialiser. Listes et recherches : la page (bornee par
+# MAX_PAGE_SIZE) est lue, puis hachee ; le JSON n'est produit que si elle a change.
+# Ecritures : POST /api/shows/batch, meme traitement que le formulaire /shows/batch, et
+# POST /api/venues/delete, /api/artists/delete pour supprimer un lot de lignes.
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+def etag_for(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def to_json(value):
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def conditional(etag, build):
+    """304 if the client already has `etag`, else the JSON produced by `build()`."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(to_json(build()))
+    response.set_etag(etag)
+    # Le client garde la reponse mais revalide a chaque fois
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def listing(items, pager, **extra):
+    return dict(extra, data=items, next=pager['next'], prev=pager['prev'])
+
+# ================================================================== #
+# --------------------------- Listes ---------------------------
+# ================================================================== #
+
+
+@api.route('/venues')
+def venues():
+    criteria, facets, url_args = listing_facets(Venue)
+    areas, pager = venue_areas(criteria, url_args)
+    facets = [{'genre': facet['genre'], 'count': facet['count'], 'active': facet['active']} for facet in facets]
+    return conditional(etag_for(areas, facets, pager), lambda: listing(areas, pager, facets=facets))
+
+
+@api.route('/artists')
+def artists():
+    criteria, facets, url_args = listing_facets(Artist)
+    data, pager = artist_list(criteria, url_args)
+    facets = [{'genre': facet['genre'], 'count': facet['count'], 'active': facet['active']} for facet in facets]
+    return conditional(etag_for(data, facets, pager), lambda: listing(data, pager, facets=facets))
+
+
+@api.route('/shows')
+def shows():
+    criteria, _, url_args = show_listing_filters()
+    data, pager = show_list(criteria, url_args)
+    return conditional(etag_for(data, pager), lambda: listing(data, pager))
+
+
+@api.route('/venues/search')
+def search_venues():
+    results, pager = search_results(Venue, request.args.get('search_term', ''))
+    return conditional(etag_for(results, pager), lambda: listing(results['data'], pager, count=results['count']))
+
+
+@api.route('/artists/search')
+def search_artists():
+    results, pager = search_results(Artist, request.args.get('search_term', ''))
+    return conditional(etag_for(results, pager), lambda: listing(results['data'], pager, count=results['count']))
+
+# ================================================================== #
+# --------------------------- Details ---------------------------
+# ================================================================== #
+
+
+@api.route('/venues/<int:venue_id>')
+def show_venue(venue_id):
+    version = venue_version(venue_id)
+    if version is None:
+        abort(404)
+    return conditional(
+        etag_for('venue', venue_id, tuple(version)),
+        lambda: venue_detail(Venue.query.get(venue_id))
+    )
+
+
+@api.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+    version = artist_version(artist_id)
+    if version is None:
+        abort(404)
+    return conditional(
+        etag_for('artist', artist_id, tuple(version)),
+        lambda: artist_detail(Artist.query.get(artist_id))
+    )
+
+# ================================================================== #
+# --------------------------- Ecriture ---------------------------
+# ================================================================== #
+
+
+@api.route('/shows/batch', methods=['POST'])
+def create_shows_batch():
+    """Create many shows at once: all of them, or none with the errors of each row."""
+    payload = request.get_json(silent=True)
+    records = payload.get('shows') if isinstance(payload, dict) else payload
+    if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+        return jsonify({'error': 'Expected a JSON list of shows, or {"shows": [...]}.'}), 400
+
+    rows, errors = create_shows(records)
+    if errors:
+        return jsonify({'errors': [{'index': position, 'errors': errors[position]} for position in sorted(errors)]}), 422
+
+    page_cache.invalidate('venue', *{row['venue_id'] for row in rows})
+    page_cache.invalidate('artist', *{row['artist_id'] for row in rows})
+    return jsonify({'created': len(rows)}), 201
+
+
+@api.route('/<any(venues, artists):table>/delete', methods=['POST'])
+def delete_batch(table):
+    """Delete many venues or artists, with their shows, in one transaction."""
+    payload = request.get_json(silent=True)
+    ids = payload.get('ids') if isinstance(payload, dict) else payload
+    if not isinstance(ids, list) or not ids or not all(isinstance(id, int) and not isinstance(id, bool) for id in ids):
+        return jsonify({'error': 'Expected a JSON list of ids, or {"ids": [...]}.'}), 400
+
+    kind = table[:-1]
+    try:
+        deleted, partner_ids = delete_owners(kind, ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    forget_owners(kind, deleted, partner_ids)
+    return jsonify({'deleted': deleted, 'not_found': sorted(set(ids) - set(deleted))})
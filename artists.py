@@ -0,0 +1,166 @@
+from flask import Blueprint, current_app, abort, render_template, request, flash, redirect, url_for
+from datetime import datetime as dt
+from forms import ArtistForm, ArtistEditForm
+from models import db, Venue, Artist, Show
+from queries import listing_facets, artist_list, search_results, artist_detail, show_partner_ids, calendar_month, parse_month, owner_shows, artist_version, touch_rows
+from cache import page_cache
+from autocomplete import autocomplete
+from pages import stream_page, render_calendar, edited_values, update_versioned
+
+artists = Blueprint('artists', __name__)
+
+# ================================================================== #
+# --------------------------- ARTIST ---------------------------
+# Les fonctionnalites sont presque pareilles, alors ici, je ne commenterai pas assez
+# ================================================================== #
+
+# --------------------------Obtenir l'id et le nom de tous les artistes--------------------------------------------#
+
+@artists.route('/artists')
+def list_artists():
+	criteria, facets, url_args = listing_facets(Artist)
+	data, pager = artist_list(criteria, url_args)
+	return stream_page('pages/artists.html', artists=data, pager=pager, facets=facets)
+
+# --------------------------Chercher des artistes avec non sensitive casse--------------------------------------------#
+
+@artists.route('/artists/search', methods=['GET', 'POST'])
+def search_artists():
+	search_term = request.values.get('search_term', '')
+	response, pager = search_results(Artist, search_term)
+	return stream_page('pages/search_artists.html', results=response, search_term=search_term, pager=pager)
+
+# --------------------------Obtenir tous les details sur un artiste selon son id--------------------------------------------#
+
+@artists.route('/artists/<int:artist_id>')
+def show_artist(artist_id):
+	def render():
+		form = ArtistEditForm()
+		good_artist_id = Artist.query.filter_by(id=artist_id).first()
+
+		if not good_artist_id:
+			abort(404)
+
+		data = artist_detail(good_artist_id)
+		return render_template('pages/show_artist.html', artist=data, form=form)
+
+	return page_cache.cached('artist', artist_id, render, artist_version)
+
+# --------------------------Calendrier mensuel des shows d'un artiste--------------------------------------------#
+
+@artists.route('/artists/<int:artist_id>/calendar')
+def artist_calendar(artist_id):
+	artist = Artist.query.get_or_404(artist_id)
+	month = request.args.get('month', type=parse_month) or dt.today().date().replace(day=1)
+	weeks = calendar_month(Show.artist_id, artist_id, Venue, 'venue', month)
+	return render_calendar({'id': artist.id, 'name': artist.name, 'kind': 'artist'}, 'venue', month, weeks)
+
+# --------------------------Tous les shows a venir (ou passes) d'un artiste, page par page--------------------------------------------#
+
+@artists.route('/artists/<int:artist_id>/shows/<any(upcoming, past):when>')
+def artist_shows(artist_id, when):
+	artist = Artist.query.get_or_404(artist_id)
+	data, pager = owner_shows(Show.artist_id, artist_id, Venue, 'venue', when)
+	owner = {'id': artist.id, 'name': artist.name, 'kind': 'artist'}
+	return stream_page('pages/owner_shows.html', owner=owner, partner='venue', when=when, shows=data, pager=pager)
+
+# --------------------------Mettre a jour les informations d'un artiste--------------------------------------------#
+
+@artists.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+		artist = Artist.query.filter_by(id=artist_id).first()
+
+		if not artist:
+			abort(404)
+
+		form = ArtistEditForm(obj=artist)
+		return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@artists.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+	form = ArtistEditForm()
+
+	if form.validate_on_submit():
+		try:
+			# Une seule requete, sans verrou : refusee si l'artiste a change depuis l'affichage du formulaire
+			version = update_versioned(Artist, artist_id, form.version.data, edited_values(form, Artist))
+
+			if version is not None:
+				# Les pages des venues affichent le nom et l'image de l'artiste : leur version change aussi
+				venue_ids = show_partner_ids(Show.artist_id, artist_id, Show.venue_id)
+				touch_rows(Venue, venue_ids)
+				db.session.commit()
+				page_cache.invalidate('artist', artist_id)
+				page_cache.invalidate('facets', 'artist')
+				page_cache.invalidate('venue', *venue_ids)
+				autocomplete.add('artist', artist_id, form.name.data)
+
+				# on successful db update, flash success
+				flash('Artist ' + form.name.data + ' was successfully updated!')
+				return redirect(url_for('artists.show_artist', artist_id=artist_id))
+		except Exception:
+			db.session.rollback()
+			# on unsuccessful db update, flash an error instead.
+			flash('An error occurred. Artist ' + request.form['name'] + ' could not be updated.')
+			current_app.logger.exception('Artist %s could not be updated', artist_id, extra={'artist_id': artist_id})
+			return render_template('forms/edit_artist.html', form=form)
+		finally:
+			db.session.close()
+
+		# Aucune ligne modifiee : l'artiste a ete supprime, ou modifie par quelqu'un d'autre depuis l'affichage du formulaire
+		artist = Artist.query.get_or_404(artist_id)
+		flash('Artist ' + artist.name + ' was changed by someone else in the meantime. Check the current values and submit again.')
+		return render_template('forms/edit_artist.html', form=ArtistEditForm(obj=artist, formdata=None), artist=artist)
+	else:
+		flash(form.errors)
+		return render_template('forms/edit_artist.html', form=form)
+
+# --------------------------Implementation de la creation d'un artiste--------------------------------------------#
+
+@artists.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+@artists.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+	form = ArtistForm()
+	if form.validate_on_submit():
+
+		try:
+
+			artist = Artist(
+				name=form.name.data,
+				city=form.city.data,
+				state=form.state.data,
+				phone=form.phone.data,
+				genres=form.genres.data,
+				image_link=form.image_link.data,
+				facebook_link=form.facebook_link.data,
+				website_link=form.website_link.data,
+				seeking_description=form.seeking_description.data
+			)
+
+			if form.seeking_venue.data:
+				artist.seeking_venue=True
+
+			db.session.add(artist)
+			db.session.commit()
+			autocomplete.add('artist', artist.id, artist.name)
+			page_cache.invalidate('facets', 'artist')
+
+			# on successful db insert, flash success
+			flash('Artist ' + request.form['name'] + ' was successfully listed!')
+			return redirect(url_for('pages.index'))
+		except Exception:
+			# on unsuccessful db insert, flash an error instead.
+			flash('An error occurred. Venue ' + request.form['name'] + ' could not be listed.')
+			current_app.logger.exception('Artist %s could not be listed', request.form['name'])
+			db.session.rollback()
+			return render_template('forms/new_artist.html', form=form)
+		finally:
+			db.session.close()
+	else:
+		flash(form.errors)
+		return render_template('forms/new_artist.html', form=form)
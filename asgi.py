@@ -0,0 +1,226 @@
+"""ASGI entry point: the read-heavy pages served on the asyncio engine.
+
+    pip install uvicorn asgiref asyncpg 'sqlalchemy>=1.4'
+    uvicorn asgi:application --workers 4
+
+The venue and artist detail pages and /shows are served here on asyncpg
+connections, running their independent queries concurrently. Every other
+route (forms, listings, searches, API, /metrics, static files) is handed to
+the Flask app unchanged, so templates, forms and URLs are the same in both
+modes and the two can be benchmarked side by side with bench.load. Pages
+served here carry the same X-Request-ID, Server-Timing (db, tpl, total),
+request log line and /metrics histograms as the Flask routes.
+"""
+import asyncio
+import re
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import g, render_template, session
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import create_app
+from cache import page_cache
+from forms import genre_available
+from logs import logs, REQUEST_ID, REQUEST_ID_HEADER
+from metrics import metrics
+from models import Venue, Artist, Show
+from pagination import keyset_query, keyset_result
+from queries import (
+    split_shows_query, split_rows, venue_fields, artist_fields,
+    show_list_query, show_list_rows, show_listing_filters, SHOW_LIST_KEY,
+    detail_version_query
+)
+
+#----------------------------------------------------------------------------#
+# Engine asyncio
+#----------------------------------------------------------------------------#
+
+# Meme base et memes reglages de pool que l'app Flask, avec le driver asyncpg.
+# Les replicas ne sont pas utilises ici : tout est lu sur le primaire.
+app = create_app()
+engine = create_async_engine(
+    make_url(app.config['SQLALCHEMY_DATABASE_URI']).set(drivername='postgresql+asyncpg'),
+    **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+)
+flask_app = WsgiToAsgi(app)
+
+# Mesures de la requete en cours, comme g.sql_* dans metrics.py. Les taches de
+# asyncio.gather() heritent de la variable et remplissent le meme objet.
+request_state = ContextVar('request_state', default=None)
+
+
+def count_query(statement, started):
+    state = request_state.get()
+    if state is not None:
+        state.sql_count += 1
+        state.sql_time += time.perf_counter() - started
+        state.sql_statements[statement] += 1
+
+
+async def fetch(query):
+    # Une connexion par requete SQL : deux fetch() lances ensemble tournent en parallele
+    started = time.perf_counter()
+    async with engine.connect() as connection:
+        result = await connection.execute(query.statement)
+        rows = result.all()
+    count_query(str(query.statement), started)
+    return rows
+
+
+async def load(model, id):
+    started = time.perf_counter()
+    async with AsyncSession(engine) as db_session:
+        row = await db_session.get(model, id)
+    count_query('SELECT {} BY id'.format(model.__tablename__), started)
+    return row
+
+#----------------------------------------------------------------------------#
+# Pages
+#----------------------------------------------------------------------------#
+
+DETAILS = {
+    'venue': (Venue, Show.venue_id, Artist, 'artist', venue_fields),
+    'artist': (Artist, Show.artist_id, Venue, 'venue', artist_fields),
+}
+
+
+async def show_detail(kind, id):
+    model, owner_column, other, prefix, fields = DETAILS[kind]
+    version = None
+    if page_cache.local:
+        # ======== lru : une copie par worker, la cle porte la version lue en base (voir cache.py) ========
+        found = await fetch(detail_version_query(model, id))
+        if not found:
+            return 404, render_template('errors/404.html')
+        version = found[0]
+    # ======== Le cache peut etre Redis (client synchrone) : ses appels sortent de la boucle d'evenements ========
+    key = await asyncio.to_thread(page_cache.key, kind, id, version)
+    page = await asyncio.to_thread(page_cache.backend.get, key)
+    if page is not None:
+        return 200, page
+
+    # ======== La ligne et ses shows ne dependent pas l'une de l'autre : les deux requetes partent ensemble ========
+    row, rows = await asyncio.gather(
+        load(model, id),
+        fetch(split_shows_query(owner_column, id, other, prefix))
+    )
+    if row is None:
+        return 404, render_template('errors/404.html')
+
+    page = render_template('pages/show_{}.html'.format(kind), **{kind: fields(row, split_rows(rows, prefix))})
+    await asyncio.to_thread(page_cache.backend.set, key, page)
+    return 200, page
+
+
+async def shows():
+    criteria, filters, url_args = show_listing_filters()
+    query, state = keyset_query(show_list_query().filter(*criteria), SHOW_LIST_KEY)
+    rows, pager = keyset_result(await fetch(query), state, **url_args)
+    genres = [genre for genre, _ in genre_available]
+    return 200, render_template('pages/shows.html', shows=show_list_rows(rows), pager=pager, filters=filters, genres=genres)
+
+
+# Memes noms d'endpoint que les routes Flask : /metrics et les journaux les confondent
+ROUTES = [
+    (re.compile(r'/venues/(\d+)'), 'venues.show_venue', lambda id: show_detail('venue', int(id))),
+    (re.compile(r'/artists/(\d+)'), 'artists.show_artist', lambda id: show_detail('artist', int(id))),
+    (re.compile(r'/shows'), 'shows.list_shows', shows),
+]
+
+#----------------------------------------------------------------------------#
+# Application ASGI
+#----------------------------------------------------------------------------#
+
+
+def match(scope):
+    if scope['method'] != 'GET':
+        return None, None, ()
+    for pattern, endpoint, handler in ROUTES:
+        found = pattern.fullmatch(scope['path'])
+        if found:
+            return endpoint, handler, found.groups()
+    return None, None, ()
+
+
+def request_context(scope):
+    # Contexte Flask construit depuis le scope : url_for, session et templates marchent comme en WSGI
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+    base_url = '{}://{}{}'.format(scope.get('scheme', 'http'), headers.get('host', 'localhost'), scope.get('root_path', ''))
+    return app.test_request_context(
+        scope['path'],
+        base_url=base_url,
+        query_string=scope['query_string'],
+        headers=headers
+    )
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await engine.dispose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+
+    endpoint, handler, args = match(scope) if scope['type'] == 'http' else (None, None, ())
+    if handler is None:
+        return await flask_app(scope, receive, send)
+
+    started = time.perf_counter()
+    state = SimpleNamespace(request_start=started, log_started=started, sql_count=0, sql_time=0.0, sql_statements=Counter())
+    with request_context(scope) as context:
+        # ======== Un message flash doit etre consomme et la session reecrite : c'est le travail de Flask ========
+        delegate = bool(session.get('_flashes'))
+        if not delegate:
+            # Memes champs que logs.start_request / metrics.start_request, pour les journaux et le rendu
+            request_id = context.request.headers.get(REQUEST_ID_HEADER, '')
+            g.request_id = request_id if REQUEST_ID.fullmatch(request_id) else uuid.uuid4().hex
+            g.log_started = started
+            g.template_start = []
+            g.template_time = 0.0
+            token = request_state.set(state)
+            try:
+                status, page = await handler(*args)
+            except Exception:
+                app.logger.exception('Error on %s', scope['path'])
+                status, page = 500, render_template('errors/500.html')
+            finally:
+                request_state.reset(token)
+            request_id, template_time = g.request_id, g.template_time
+            fields = {'request_id': request_id, 'method': 'GET', 'path': scope['path'], 'endpoint': endpoint, 'status': status}
+            full_path = context.request.full_path.rstrip('?')
+
+    if delegate:
+        return await flask_app(scope, receive, send)
+
+    total = metrics.observe(endpoint, state)
+    if app.config.get('LOG_REQUESTS', True):
+        logs.log_request(full_path, fields, state)
+
+    body = page.encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'text/html; charset=utf-8'),
+            (b'content-length', str(len(body)).encode('ascii')),
+            (REQUEST_ID_HEADER.lower().encode('ascii'), request_id.encode('ascii')),
+            (b'server-timing', 'db;dur={:.2f};desc="{} queries"'.format(state.sql_time * 1000, state.sql_count).encode('ascii')),
+            (b'server-timing', 'tpl;dur={:.2f}'.format(template_time * 1000).encode('ascii')),
+            (b'server-timing', 'total;dur={:.2f}'.format(total * 1000).encode('ascii')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,145 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for
+from flask.cli import with_appcontext
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#----------------------------------------------------------------------------#
+# Assets statiques : empreinte, precompression et cache longue duree
+#----------------------------------------------------------------------------#
+
+# flask assets copie chaque fichier de static/ dans static/dist/ sous un nom qui
+# contient le hash de son contenu (css/main.1a2b3c4d5e.css), ecrit a cote les
+# variantes .gz (et .br si le module brotli est installe) et un manifest.json.
+# Les templates passent par asset_url('css/main.css') ; /assets/ sert la variante
+# compressee acceptee par le client avec Cache-Control immutable : un fichier modifie
+# change de nom, il n'y a donc jamais besoin de revalider.
+
+DIST = 'dist'
+COMPRESSIBLE = {'.css', '.js', '.map', '.svg', '.ttf', '.otf', '.eot', '.json', '.txt'}
+IMMUTABLE = 'public, max-age=31536000, immutable'
+CSS_URL = re.compile(r'''url\((['"]?)([^'")?#]+)([^'")]*)\1\)''')
+
+assets = Blueprint('assets', __name__)
+
+_manifest = {}
+
+
+def dist_folder():
+    return os.path.join(current_app.static_folder, DIST)
+
+
+def load_manifest():
+    path = os.path.join(dist_folder(), 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as stream:
+        return json.load(stream)
+
+
+@assets.app_template_global()
+def asset_url(filename):
+    # Sans build (developpement), on retombe sur le fichier d'origine dans /static
+    if 'manifest' not in _manifest:
+        _manifest['manifest'] = load_manifest()
+    hashed = _manifest['manifest'].get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('assets.serve_asset', filename=hashed)
+
+
+@assets.route('/assets/<path:filename>')
+def serve_asset(filename):
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    folder = dist_folder()
+
+    encoding = None
+    for candidate, extension in (('br', '.br'), ('gzip', '.gz')):
+        if candidate in request.accept_encodings and os.path.exists(os.path.join(folder, filename + extension)):
+            encoding = candidate
+            filename = filename + extension
+            break
+
+    response = send_from_directory(folder, filename, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def fingerprint(relative, content):
+    root, extension = os.path.splitext(relative)
+    return '{}.{}{}'.format(root, hashlib.sha256(content).hexdigest()[:10], extension)
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as stream:
+        stream.write(content)
+
+
+def rewrite_css(relative, content, manifest):
+    # Les url(../fonts/x.woff) d'une feuille CSS pointent vers les noms avec empreinte
+    base = posixpath.dirname(relative)
+
+    def replace(match):
+        quote, target, suffix = match.groups()
+        resolved = posixpath.normpath(posixpath.join(base, target))
+        if resolved not in manifest:
+            return match.group(0)
+        return 'url({0}{1}{2}{0})'.format(quote, posixpath.relpath(manifest[resolved], base), suffix)
+
+    return CSS_URL.sub(replace, content.decode('utf-8', 'surrogateescape')).encode('utf-8', 'surrogateescape')
+
+
+@click.command('assets')
+@with_appcontext
+def assets_command():
+    """Fingerprint and precompress everything under static/ into static/dist/."""
+    static, dist = current_app.static_folder, dist_folder()
+    sources = []
+    for directory, subdirectories, files in os.walk(static):
+        if os.path.abspath(directory).startswith(os.path.abspath(dist)):
+            continue
+        for name in files:
+            source = os.path.join(directory, name)
+            sources.append((os.path.relpath(source, static).replace(os.sep, '/'), source))
+
+    # Les feuilles CSS en dernier : leurs url() doivent connaitre les noms des polices & images
+    sources.sort(key=lambda item: (item[0].endswith('.css'), item[0]))
+
+    manifest = {}
+    for relative, source in sources:
+        with open(source, 'rb') as stream:
+            content = stream.read()
+        if relative.endswith('.css'):
+            content = rewrite_css(relative, content, manifest)
+
+        hashed = fingerprint(relative, content)
+        target = os.path.join(dist, hashed)
+        manifest[relative] = hashed
+        if os.path.exists(target):
+            continue
+
+        write(target, content)
+        if os.path.splitext(relative)[1] in COMPRESSIBLE:
+            write(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            if brotli is not None:
+                write(target + '.br', brotli.compress(content))
+
+    write(os.path.join(dist, 'manifest.json'), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    click.echo('{} assets written to {}{}'.format(
+        len(manifest), dist, '' if brotli else ' (install brotli for .br variants)'
+    ))
@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from flask import current_app, jsonify, request
+
+from models import db, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Autocompletion des noms : /autocomplete?type=artist|venue&q=
+#----------------------------------------------------------------------------#
+
+# Chaque processus garde, par type, un tableau trie de (cle, nom, id) avec une cle par debut
+# de mot ("the blue note", "blue note", "note") : une recherche par prefixe est une
+# dichotomie, sans aller en base. Le tableau est charge au premier appel, mis a jour par
+# les formulaires de ce processus (add / remove), et complete en arriere-plan toutes les
+# AUTOCOMPLETE_REFRESH_SECONDS avec les lignes modifiees ailleurs (index sur updated_at) ;
+# les suppressions faites par un autre processus disparaissent au rechargement complet,
+# toutes les AUTOCOMPLETE_RELOAD_SECONDS. Les lecteurs ne prennent pas de verrou :
+# chaque ecriture remplace le tableau entier.
+
+MODELS = {'artist': Artist, 'venue': Venue}
+WORD_START = re.compile(r'(?:^|(?<=\W))\w', re.UNICODE)
+
+
+def name_keys(name):
+    folded = name.casefold()
+    return {folded[match.start():] for match in WORD_START.finditer(folded)} or {folded}
+
+
+class PrefixIndex:
+
+    def __init__(self, model):
+        self.model = model
+        self.entries = []
+        self.names = {}
+        self.loaded_at = None
+        self.refreshed_at = None
+        self.seen_until = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def load(self):
+        rows = db.session.query(self.model.id, self.model.name, self.model.updated_at).all()
+        db.session.rollback()
+        with self._lock:
+            self.names = {id: name for id, name, _ in rows}
+            self.entries = sorted((key, name, id) for id, name in self.names.items() for key in name_keys(name))
+            self.seen_until = max((updated_at for _, _, updated_at in rows), default=None)
+            self.loaded_at = self.refreshed_at = time.monotonic()
+
+    def add(self, id, name):
+        with self._lock:
+            entries = [entry for entry in self.entries if entry[2] != id] if id in self.names else list(self.entries)
+            for key in name_keys(name):
+                insort(entries, (key, name, id))
+            self.names[id] = name
+            self.entries = entries
+
+    def remove(self, id):
+        with self._lock:
+            if self.names.pop(id, None) is not None:
+                self.entries = [entry for entry in self.entries if entry[2] != id]
+
+    def refresh(self):
+        # ======== Seulement les lignes creees ou modifiees depuis le dernier passage ========
+        query = db.session.query(self.model.id, self.model.name, self.model.updated_at)
+        if self.seen_until is not None:
+            query = query.filter(self.model.updated_at > self.seen_until)
+        rows = query.all()
+        db.session.rollback()
+        for id, name, updated_at in rows:
+            if self.names.get(id) != name:
+                self.add(id, name)
+            self.seen_until = max(self.seen_until or updated_at, updated_at)
+        self.refreshed_at = time.monotonic()
+
+    def search(self, prefix, limit):
+        prefix = prefix.casefold()
+        entries = self.entries
+        results, seen = [], set()
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(results) < limit:
+            key, name, id = entries[position]
+            if not key.startswith(prefix):
+                break
+            if id not in seen:
+                seen.add(id)
+                results.append({'id': id, 'name': name})
+            position += 1
+        return results
+
+
+class Autocomplete:
+
+    def __init__(self):
+        self.indexes = {kind: PrefixIndex(model) for kind, model in MODELS.items()}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        app.add_url_rule('/autocomplete', 'autocomplete', self.view)
+
+    def index(self, kind):
+        index = self.indexes[kind]
+        if index.loaded_at is None:
+            # Premier appel du processus : chargement complet, une seule fois
+            with self._lock:
+                if index.loaded_at is None:
+                    index.load()
+        elif time.monotonic() - index.loaded_at > self.app.config.get('AUTOCOMPLETE_RELOAD_SECONDS', 600):
+            self.refresh_later(index, index.load)
+        elif time.monotonic() - index.refreshed_at > self.app.config.get('AUTOCOMPLETE_REFRESH_SECONDS', 30):
+            self.refresh_later(index, index.refresh)
+        return index
+
+    def refresh_later(self, index, job):
+        # ======== Hors du chemin de la requete : elle repond avec l'index courant ========
+        with self._lock:
+            if index._refreshing:
+                return
+            index._refreshing = True
+
+        def run():
+            try:
+                with self.app.app_context():
+                    job()
+            except Exception as e:
+                self.app.logger.warning('Autocomplete refresh failed: %s', e)
+            finally:
+                index._refreshing = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def add(self, kind, id, name):
+        # Index pas encore charge : il lira la ligne en base au premier appel
+        if self.indexes[kind].loaded_at is not None:
+            self.indexes[kind].add(id, name)
+
+    def remove(self, kind, id):
+        self.indexes[kind].remove(id)
+
+    def view(self):
+        kind = request.args.get('type', '')
+        prefix = request.args.get('q', '').strip()
+        if kind not in self.indexes:
+            return jsonify({'error': 'type must be artist or venue'}), 400
+        if not prefix:
+            return jsonify([])
+        limit = current_app.config.get('AUTOCOMPLETE_LIMIT', 10)
+        return jsonify(self.index(kind).search(prefix, limit))
+
+
+autocomplete = Autocomplete()
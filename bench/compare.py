@@ -0,0 +1,40 @@
+"""Compare two bench.load result files route by route.
+
+    python -m bench.compare bench/before.json bench/after.json
+"""
+import argparse
+import json
+
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'sql_per_request')
+
+
+def change(before, after):
+    if before is None or after is None:
+        return '-'
+    if not before:
+        return '{:.1f}'.format(after)
+    return '{:+.0f}%'.format((after - before) / before * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+
+    with open(args.before) as stream:
+        before = json.load(stream)
+    with open(args.after) as stream:
+        after = json.load(stream)
+
+    print('{} -> {}'.format((before.get('commit') or '?')[:10], (after.get('commit') or '?')[:10]))
+    print('{:<20}'.format('route') + ''.join('{:>16}'.format(metric) for metric in METRICS))
+    for route in sorted(set(before['routes']) & set(after['routes'])):
+        print('{:<20}'.format(route) + ''.join(
+            '{:>16}'.format(change(before['routes'][route][metric], after['routes'][route][metric]))
+            for metric in METRICS
+        ))
+
+
+if __name__ == '__main__':
+    main()
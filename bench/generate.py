@@ -0,0 +1,162 @@
+"""Seed the database with synthetic artists, venues and shows.
+
+    python -m bench.generate --scale small --seed 42 --reset
+
+Same seed and scale give the same data (show dates are relative to the
+minute of the run). Rows are loaded with COPY in batches; only the
+(venue, minute) and (artist, minute) keys of the shows are kept in memory, to
+avoid double bookings. Show counters are rebuilt once at the end.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from app import create_app
+from counters import rebuild
+from forms import genre_available
+from importer import TABLES, copy_rows
+from models import db, Artist, Venue
+
+SCALES = {
+    'tiny': {'artists': 1000, 'venues': 200, 'shows': 20000},
+    'small': {'artists': 10000, 'venues': 2000, 'shows': 200000},
+    'large': {'artists': 100000, 'venues': 20000, 'shows': 2000000},
+}
+
+# Quelques grandes villes concentrent l'essentiel du catalogue (loi de Zipf)
+CITIES = [
+    ('New York', 'NY'), ('Los Angeles', 'CA'), ('Chicago', 'IL'), ('Austin', 'TX'),
+    ('Nashville', 'TN'), ('San Francisco', 'CA'), ('Seattle', 'WA'), ('New Orleans', 'LA'),
+    ('Atlanta', 'GA'), ('Boston', 'MA'), ('Denver', 'CO'), ('Portland', 'OR'),
+    ('Philadelphia', 'PA'), ('Detroit', 'MI'), ('Minneapolis', 'MN'), ('Miami', 'FL'),
+    ('Houston', 'TX'), ('Dallas', 'TX'), ('Phoenix', 'AZ'), ('Las Vegas', 'NV'),
+    ('Memphis', 'TN'), ('Kansas City', 'MO'), ('Pittsburgh', 'PA'), ('Baltimore', 'MD'),
+    ('Salt Lake City', 'UT'), ('Columbus', 'OH'), ('Cleveland', 'OH'), ('Richmond', 'VA'),
+    ('Albuquerque', 'NM'), ('Portland', 'ME'), ('Springfield', 'IL'), ('Springfield', 'MO'),
+]
+GENRES = [genre for genre, _ in genre_available]
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'zen', 'tor', 'vel', 'dus', 'ne', 'sha', 'qui', 'bo', 'ly', 'ar', 'ex', 'fi']
+WORDS = {
+    'artists': ['The', 'Band', 'Trio', 'Quartet', 'Collective', 'Brothers', 'Sisters', 'Project', 'Orchestra'],
+    'venues': ['Hall', 'Club', 'Room', 'Theatre', 'Lounge', 'Garden', 'Bar', 'Arena', 'Cellar'],
+}
+
+
+def zipf_weights(count, exponent=1.1):
+    # Poids cumules : random.choices fait alors une recherche dichotomique, pas une somme par tirage
+    return list(accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def make_name(rng, kind):
+    word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return '{} {}'.format(word, rng.choice(WORDS[kind]))
+
+
+def entity_rows(rng, kind, count):
+    city_weights = zipf_weights(len(CITIES))
+    genre_weights = zipf_weights(len(GENRES), 0.8)
+    for index in range(count):
+        city, state = rng.choices(CITIES, cum_weights=city_weights)[0]
+        genres = sorted(set(rng.choices(GENRES, cum_weights=genre_weights, k=rng.randint(1, 3))))
+        phone = '{:03d}-{:03d}-{:04d}'.format(rng.randint(200, 999), rng.randint(0, 999), rng.randint(0, 9999))
+        seeking = rng.random() < 0.3
+        row = {
+            'name': make_name(rng, kind),
+            'city': city,
+            'state': state,
+            'address': '{} {} St'.format(rng.randint(1, 9999), make_name(rng, kind).split()[0]),
+            'phone': phone,
+            'genres': genres,
+            'image_link': 'https://picsum.photos/seed/{}{}/300/300'.format(kind, index),
+            'facebook_link': 'https://www.facebook.com/{}{}'.format(kind, index),
+            'website_link': 'https://{}{}.example.com'.format(kind, index),
+            'seeking_venue': seeking,
+            'seeking_talent': seeking,
+            'seeking_description': 'Looking for a good match!' if seeking else None,
+        }
+        yield [row[column] for column in TABLES[kind][1]]
+
+
+def show_rows(rng, count, artist_ids, venue_ids):
+    # Les salles et artistes populaires accueillent beaucoup plus de shows
+    venue_weights = zipf_weights(len(venue_ids), 0.9)
+    artist_weights = zipf_weights(len(artist_ids), 0.7)
+    now = datetime.now().replace(second=0, microsecond=0)
+    # Les contraintes d'exclusion refusent deux shows a la meme minute dans une venue ou pour un artiste :
+    # cles (id, minute) deja prises, en entiers pour tenir en memoire a l'echelle 'large'
+    minutes = 4 * 365 * 24 * 60
+    taken_venues, taken_artists = set(), set()
+    produced = 0
+    while produced < count:
+        artist_id = rng.choices(artist_ids, cum_weights=artist_weights)[0]
+        venue_id = rng.choices(venue_ids, cum_weights=venue_weights)[0]
+        minute = rng.randrange(minutes)
+        venue_key, artist_key = venue_id * minutes + minute, artist_id * minutes + minute
+        if venue_key in taken_venues or artist_key in taken_artists:
+            continue
+        taken_venues.add(venue_key)
+        taken_artists.add(artist_key)
+        produced += 1
+        start_time = now + timedelta(minutes=minute - 3 * 365 * 24 * 60)
+        yield [artist_id, venue_id, start_time, None]
+
+
+def load(table, rows, total, batch_size):
+    columns = TABLES[table][1]
+    started, batch, loaded = time.perf_counter(), [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            copy_rows(table, columns, batch)
+            db.session.commit()
+            loaded += len(batch)
+            batch = []
+            print('{}: {}/{}'.format(table, loaded, total), flush=True)
+    if batch:
+        copy_rows(table, columns, batch)
+        db.session.commit()
+        loaded += len(batch)
+    print('{}: {} rows in {:.1f}s'.format(table, loaded, time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=sorted(SCALES), default='tiny')
+    parser.add_argument('--artists', type=int)
+    parser.add_argument('--venues', type=int)
+    parser.add_argument('--shows', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--reset', action='store_true', help='Truncate artists, venues and shows first.')
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.scale])
+    for table in sizes:
+        if getattr(args, table) is not None:
+            sizes[table] = getattr(args, table)
+
+    rng = random.Random(args.seed)
+    with create_app().app_context():
+        if args.reset:
+            db.session.execute(db.text('TRUNCATE shows, venues, artists RESTART IDENTITY CASCADE'))
+            db.session.commit()
+
+        load('artists', entity_rows(rng, 'artists', sizes['artists']), sizes['artists'], args.batch_size)
+        load('venues', entity_rows(rng, 'venues', sizes['venues']), sizes['venues'], args.batch_size)
+
+        artist_ids = [id for (id,) in db.session.query(Artist.id).order_by(Artist.id)]
+        venue_ids = [id for (id,) in db.session.query(Venue.id).order_by(Venue.id)]
+        db.session.rollback()
+        load('shows', show_rows(rng, sizes['shows'], artist_ids, venue_ids), sizes['shows'], args.batch_size)
+
+        # Un seul recomptage a la fin plutot qu'une mise a jour des compteurs par paquet
+        rebuild()
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE shows; ANALYZE venues; ANALYZE artists'))
+        db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Drive load against a running Fyyur server and record per-route latency.
+
+    python -m bench.load --url http://localhost:5000 --requests 200 --concurrency 8 --output bench/results.json
+
+Every GET page and API route is exercised (detail pages and searches with random
+ids and terms picked with a fixed seed). For each route the report gives
+p50/p95/p99 latency, throughput and SQL statements per request, read from the
+Server-Timing header. Results are written as JSON, tagged with the current
+git commit, so runs can be compared between commits.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import subprocess
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import create_app
+from models import db, Artist, Venue
+
+SQL_TIMING = re.compile(r'db;dur=([0-9.]+);desc="(\d+) queries"')
+SEARCH_TERMS = ['ka', 'lo', 'band', 'hall', 'zen', 'club', 'New York, NY', 'Austin, TX', 'qui', 'theatre']
+PREFIXES = ['k', 'lo', 'ban', 'the', 'ja', 'mu', 'r', 'st']
+
+
+def routes(rng, venue_ids, artist_ids):
+    """Map route names to path factories, called once per request."""
+    quote = urllib.parse.quote
+    return {
+        'index': lambda: '/',
+        'venues': lambda: '/venues',
+        'venues_genre': lambda: '/venues?genre=Jazz&state=NY',
+        'artists': lambda: '/artists',
+        'artists_genre': lambda: '/artists?genre=Rock+n+Roll',
+        'shows': lambda: '/shows',
+        'shows_filtered': lambda: '/shows?state=CA&genre=Jazz',
+        'show_venue': lambda: '/venues/{}'.format(rng.choice(venue_ids)),
+        'show_artist': lambda: '/artists/{}'.format(rng.choice(artist_ids)),
+        'venue_calendar': lambda: '/venues/{}/calendar'.format(rng.choice(venue_ids)),
+        'artist_calendar': lambda: '/artists/{}/calendar'.format(rng.choice(artist_ids)),
+        'venue_shows': lambda: '/venues/{}/shows/{}'.format(rng.choice(venue_ids), rng.choice(['upcoming', 'past'])),
+        'artist_shows': lambda: '/artists/{}/shows/{}'.format(rng.choice(artist_ids), rng.choice(['upcoming', 'past'])),
+        'autocomplete': lambda: '/autocomplete?type={}&q={}'.format(rng.choice(['artist', 'venue']), rng.choice(PREFIXES)),
+        'export_venues': lambda: '/export/venues.csv',
+        'export_shows': lambda: '/export/shows.ndjson',
+        'search_venues': lambda: '/venues/search?search_term=' + quote(rng.choice(SEARCH_TERMS)),
+        'search_artists': lambda: '/artists/search?search_term=' + quote(rng.choice(SEARCH_TERMS)),
+        'create_venue_form': lambda: '/venues/create',
+        'create_artist_form': lambda: '/artists/create',
+        'create_shows': lambda: '/shows/create',
+        'edit_venue': lambda: '/venues/{}/edit'.format(rng.choice(venue_ids)),
+        'edit_artist': lambda: '/artists/{}/edit'.format(rng.choice(artist_ids)),
+        'api_venues': lambda: '/api/venues',
+        'api_artists': lambda: '/api/artists',
+        'api_shows': lambda: '/api/shows',
+        'api_show_venue': lambda: '/api/venues/{}'.format(rng.choice(venue_ids)),
+        'api_show_artist': lambda: '/api/artists/{}'.format(rng.choice(artist_ids)),
+        'api_search_venues': lambda: '/api/venues/search?search_term=' + quote(rng.choice(SEARCH_TERMS)),
+        'api_search_artists': lambda: '/api/artists/search?search_term=' + quote(rng.choice(SEARCH_TERMS)),
+    }
+
+
+def fetch(url):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url) as response:
+            response.read()
+            status, timing = response.status, response.headers.get_all('Server-Timing') or []
+    except urllib.error.HTTPError as error:
+        status, timing = error.code, error.headers.get_all('Server-Timing') or []
+    except urllib.error.URLError:
+        status, timing = None, []
+    elapsed = time.perf_counter() - started
+
+    queries = None
+    for header in timing:
+        match = SQL_TIMING.search(header)
+        if match:
+            queries = int(match.group(2))
+    return elapsed, status, queries
+
+
+def percentile(values, fraction):
+    # Rang le plus proche sur la liste triee
+    if not values:
+        return None
+    index = max(0, math.ceil(fraction * len(values)) - 1)
+    return values[index]
+
+
+def run_route(base_url, make_path, count, concurrency):
+    paths = [make_path() for _ in range(count)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda path: fetch(base_url + path), paths))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(elapsed * 1000 for elapsed, status, _ in results if status and status < 400)
+    queries = [sql for _, _, sql in results if sql is not None]
+    return {
+        'requests': count,
+        'errors': sum(1 for _, status, _ in results if not status or status >= 400),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'throughput_rps': count / wall if wall else None,
+        'sql_per_request': sum(queries) / len(queries) if queries else None,
+        'sql_max': max(queries) if queries else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per route.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--route', action='append', help='Only run these routes (repeatable).')
+    parser.add_argument('--output', default='bench/results.json')
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        venue_ids = [id for (id,) in db.session.query(Venue.id).order_by(Venue.id).limit(10000)]
+        artist_ids = [id for (id,) in db.session.query(Artist.id).order_by(Artist.id).limit(10000)]
+    if not venue_ids or not artist_ids:
+        parser.error('the database is empty, run python -m bench.generate first')
+
+    rng = random.Random(args.seed)
+    report = {
+        'commit': git_commit(),
+        'started_at': datetime.now().isoformat(),
+        'url': args.url,
+        'requests_per_route': args.requests,
+        'concurrency': args.concurrency,
+        'routes': {},
+    }
+    for name, make_path in routes(rng, venue_ids, artist_ids).items():
+        if args.route and name not in args.route:
+            continue
+        report['routes'][name] = stats = run_route(args.url.rstrip('/'), make_path, args.requests, args.concurrency)
+        print('{:<20} p50 {:>8} p95 {:>8} p99 {:>8} ms  {:>8} req/s  {:>6} sql/req  {} errors'.format(
+            name,
+            *['{:.1f}'.format(stats[key]) if stats[key] is not None else '-'
+              for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'sql_per_request')],
+            stats['errors']
+        ), flush=True)
+
+    with open(args.output, 'w') as stream:
+        json.dump(report, stream, indent=2)
+    print('Results written to {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
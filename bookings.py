@@ -0,0 +1,95 @@
+from collections import defaultdict
+
+from models import db, SHOW_RANGE
+
+#----------------------------------------------------------------------------#
+# Conflits de reservation
+#----------------------------------------------------------------------------#
+
+# Les contraintes d'exclusion GiST sur shows.during refusent deux shows qui se chevauchent
+# dans une venue ou pour un artiste, meme envoyes au meme moment par deux clients.
+# show_conflicts() fait la meme verification a l'avance, pour tout un lot en une requete,
+# afin de renvoyer une erreur par ligne au lieu de faire echouer le lot entier.
+
+CONFLICT_ERRORS = {
+    'ex_shows_venue_id_during': ('venue_id', 'This venue already has a show at that time.'),
+    'ex_shows_artist_id_during': ('artist_id', 'This artist already has a show at that time.'),
+}
+
+# ======== Chaque ligne du lot contre les shows existants, via les index GiST (venue_id, during) et (artist_id, during) ========
+CONFLICTS_SQL = """
+WITH batch AS (
+    SELECT position, venue_id, artist_id, {range} AS during
+    FROM unnest(
+        CAST(:venue_ids AS integer[]), CAST(:artist_ids AS integer[]),
+        CAST(:start_times AS timestamp[]), CAST(:end_times AS timestamp[])
+    ) WITH ORDINALITY AS rows (venue_id, artist_id, start_time, end_time, position)
+)
+SELECT batch.position, 'ex_shows_venue_id_during' FROM batch
+    JOIN shows ON shows.venue_id = batch.venue_id AND shows.during && batch.during
+UNION
+SELECT batch.position, 'ex_shows_artist_id_during' FROM batch
+    JOIN shows ON shows.artist_id = batch.artist_id AND shows.during && batch.during
+""".format(range=SHOW_RANGE)
+
+
+def show_bounds(start_time, end_time):
+    # (debut, fin, fin incluse) : meme convention que SHOW_RANGE
+    return start_time, end_time or start_time, end_time is None
+
+
+def batch_conflicts(shows):
+    """Return {position: errors} for the shows of `shows` that overlap another one of the list.
+
+    Same rules as the exclusion constraints, without the database: per venue and per
+    artist, shows sorted by start are each compared to the one ending last before them,
+    and the one starting later is reported.
+    """
+    conflicts = defaultdict(dict)
+    for owner, constraint in ((0, 'ex_shows_venue_id_during'), (1, 'ex_shows_artist_id_during')):
+        field, message = CONFLICT_ERRORS[constraint]
+        by_owner = defaultdict(list)
+        for position, show in enumerate(shows):
+            by_owner[show[owner]].append((show_bounds(show[2], show[3]), position))
+        for entries in by_owner.values():
+            latest = None
+            for bounds, position in sorted(entries):
+                if latest is not None and (bounds[0] < latest[1] or (bounds[0] == latest[1] and latest[2])):
+                    conflicts[position][field] = [message]
+                if latest is None or bounds[1:] > latest[1:]:
+                    latest = bounds
+    return dict(conflicts)
+
+
+def show_conflicts(shows):
+    """Return {position: errors} for the shows that overlap another one at the same venue or for the same artist.
+
+    `shows` are (venue_id, artist_id, start_time, end_time) tuples, end_time may be None.
+    A row is checked against the shows already booked and against the earlier rows of `shows`.
+    """
+    shows = [(int(venue_id), int(artist_id), start_time, end_time) for venue_id, artist_id, start_time, end_time in shows]
+    if not shows:
+        return {}
+
+    conflicts = defaultdict(dict)
+    rows = db.session.execute(db.text(CONFLICTS_SQL), {
+        'venue_ids': [show[0] for show in shows],
+        'artist_ids': [show[1] for show in shows],
+        'start_times': [show[2] for show in shows],
+        'end_times': [show[3] for show in shows],
+    })
+    for position, constraint in rows:
+        field, message = CONFLICT_ERRORS[constraint]
+        conflicts[position - 1][field] = [message]
+
+    # Dans le lot lui-meme
+    for position, errors in batch_conflicts(shows).items():
+        conflicts[position].update(errors)
+
+    return dict(conflicts)
+
+
+def conflict_error(error):
+    """Return (field, message) for an IntegrityError raised by a booking constraint, else None."""
+    diag = getattr(error.orig, 'diag', None)
+    return CONFLICT_ERRORS.get(getattr(diag, 'constraint_name', None))
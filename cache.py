@@ -0,0 +1,140 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import session
+
+#----------------------------------------------------------------------------#
+# Cache des pages detail (venue / artist)
+#----------------------------------------------------------------------------#
+
+# La cle d'une page contient la version de son entite : page:venue:<id>:<version>.
+# Invalider = donner une nouvelle version a l'entite, les anciennes pages ne sont
+# plus jamais lues et sortent du cache (LRU ou TTL). Une version perdue (eviction)
+# est remplacee par une nouvelle, ce qui donne un miss et jamais une page perimee.
+#
+# CACHE_TYPE = 'lru'   : cache memoire du processus, une copie par worker. Une invalidation ne
+#                        touche que le worker qui l'a faite : la cle porte alors la version lue
+#                        sur la ligne de la venue / de l'artiste (updated_at, version, compteurs),
+#                        la meme pour tous les workers, au prix d'une lecture par cle primaire
+# CACHE_TYPE = 'redis' : cache partage entre workers, CACHE_URL = 'redis://localhost:6379/0'
+# CACHE_TYPE = 'null'  : pas de cache
+
+
+class NullCache:
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+
+class LRUCache:
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._items[key] = (value, expires)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+class RedisCache:
+
+    def __init__(self, url, ttl=60, prefix='fyyur:'):
+        # redis n'est necessaire que si CACHE_TYPE = 'redis'
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, value, ex=ttl or None)
+
+
+class PageCache:
+
+    def __init__(self):
+        self.backend = NullCache()
+        self.local = False
+
+    def init_app(self, app):
+        kind = app.config.get('CACHE_TYPE', 'lru')
+        ttl = app.config.get('CACHE_TTL', 60)
+        if kind == 'redis':
+            self.backend = RedisCache(app.config['CACHE_URL'], ttl=ttl)
+        elif kind == 'lru':
+            self.backend = LRUCache(app.config.get('CACHE_MAXSIZE', 1024), ttl=ttl)
+        else:
+            self.backend = NullCache()
+        self.local = isinstance(self.backend, LRUCache)
+
+    def version(self, kind, id):
+        key = 'version:{}:{}'.format(kind, id)
+        version = self.backend.get(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            self.backend.set(key, version, ttl=0)
+        return version
+
+    def invalidate(self, kind, *ids):
+        for id in ids:
+            self.backend.set('version:{}:{}'.format(kind, id), uuid.uuid4().hex, ttl=0)
+
+    def key(self, kind, id, row_version=None):
+        if row_version is not None:
+            return 'page:{}:{}:{}'.format(kind, id, hashlib.sha1(repr(tuple(row_version)).encode('utf-8')).hexdigest())
+        return 'page:{}:{}:{}'.format(kind, id, self.version(kind, id))
+
+    def cached(self, kind, id, render, row_version=None):
+        """Return the cached page for (kind, id), or call render() and keep its result.
+
+        With the per-process lru backend, pages are keyed on row_version(id), the
+        database versions of the page (None when the row is missing).
+        """
+        # ======== Un message flash est propre a un utilisateur : ni lu ni ecrit dans le cache ========
+        if session.get('_flashes'):
+            return render()
+
+        version = None
+        if self.local and row_version is not None:
+            version = row_version(id)
+            if version is None:
+                return render()
+        key = self.key(kind, id, version)
+        page = self.backend.get(key)
+        if page is None:
+            page = render()
+            self.backend.set(key, page)
+        return page
+
+
+page_cache = PageCache()
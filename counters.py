@@ -0,0 +1,134 @@
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+
+from models import db, Venue, Artist, Show, ShowCounters
+
+#----------------------------------------------------------------------------#
+# Compteurs de shows a venir / passes
+#----------------------------------------------------------------------------#
+
+# venues et artists portent upcoming_shows_count et past_shows_count, mis a jour dans
+# la transaction qui ajoute ou supprime des shows : les pages n'ont plus a compter les shows.
+# Un show est "a venir" si start_time >= show_counters.rolled_at ; flask counters roll,
+# lance periodiquement (cron, chaque minute), bascule en "passes" les shows commences depuis
+# et avance rolled_at. Les ecritures prennent un verrou consultatif partage et roll le prend
+# en exclusif : un show ajoute pendant un roll n'est ni oublie ni compte deux fois.
+
+LOCK_KEY = 7261
+OWNERS = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+
+
+def lock(shared=True):
+    statement = 'SELECT pg_advisory_xact_lock_shared(:key)' if shared else 'SELECT pg_advisory_xact_lock(:key)'
+    db.session.execute(db.text(statement), {'key': LOCK_KEY})
+
+
+def rolled_at():
+    return db.session.query(ShowCounters.rolled_at).scalar()
+
+
+def add_deltas(model, upcoming, past):
+    # ======== Un executemany par table ; ids tries pour verrouiller les lignes toujours dans le meme ordre ========
+    ids = sorted(set(upcoming) | set(past))
+    if not ids:
+        return
+    table = model.__table__
+    db.session.execute(
+        table.update().where(table.c.id == db.bindparam('owner_id')).values(
+            upcoming_shows_count=table.c.upcoming_shows_count + db.bindparam('upcoming'),
+            past_shows_count=table.c.past_shows_count + db.bindparam('past')
+        ),
+        [{'owner_id': id, 'upcoming': upcoming[id], 'past': past[id]} for id in ids]
+    )
+
+
+def count_shows(shows, sign=1):
+    """Add (sign=1) or remove (sign=-1) shows from the counters, in the current transaction.
+
+    `shows` are (venue_id, artist_id, start_time) tuples. The caller commits.
+    """
+    lock()
+    boundary = rolled_at()
+    deltas = {Venue: (Counter(), Counter()), Artist: (Counter(), Counter())}
+    for venue_id, artist_id, start_time in shows:
+        side = 0 if start_time >= boundary else 1
+        deltas[Venue][side][int(venue_id)] += sign
+        deltas[Artist][side][int(artist_id)] += sign
+    for model, (upcoming, past) in deltas.items():
+        add_deltas(model, upcoming, past)
+
+
+def uncount_shows(criterion):
+    """Remove the shows matching `criterion` from the counters; call it before deleting them."""
+    lock()
+    is_upcoming = Show.start_time >= rolled_at()
+    for model, column in OWNERS:
+        delta = db.session.query(
+            column.label('owner_id'),
+            db.func.count().filter(is_upcoming).label('upcoming'),
+            db.func.count().filter(~is_upcoming).label('past')
+        ).filter(criterion).group_by(column).subquery()
+        db.session.query(model).filter(model.id == delta.c.owner_id).update({
+            model.upcoming_shows_count: model.upcoming_shows_count - delta.c.upcoming,
+            model.past_shows_count: model.past_shows_count - delta.c.past,
+        }, synchronize_session=False)
+
+
+def roll(now=None):
+    """Move the shows started since the last roll from upcoming to past."""
+    lock(shared=False)
+    now = now or datetime.now()
+    boundary = rolled_at()
+    if now <= boundary:
+        return
+    for model, column in OWNERS:
+        moved = db.session.query(column.label('owner_id'), db.func.count().label('moved'))\
+            .filter(Show.start_time >= boundary, Show.start_time < now)\
+            .group_by(column).subquery()
+        db.session.query(model).filter(model.id == moved.c.owner_id).update({
+            model.upcoming_shows_count: model.upcoming_shows_count - moved.c.moved,
+            model.past_shows_count: model.past_shows_count + moved.c.moved,
+        }, synchronize_session=False)
+    db.session.query(ShowCounters).update({ShowCounters.rolled_at: now}, synchronize_session=False)
+
+
+def rebuild():
+    """Recount every venue and artist from the shows table."""
+    lock(shared=False)
+    is_upcoming = Show.start_time >= rolled_at()
+    for model, column in OWNERS:
+        db.session.query(model).update({model.upcoming_shows_count: 0, model.past_shows_count: 0}, synchronize_session=False)
+        totals = db.session.query(
+            column.label('owner_id'),
+            db.func.count().filter(is_upcoming).label('upcoming'),
+            db.func.count().filter(~is_upcoming).label('past')
+        ).group_by(column).subquery()
+        db.session.query(model).filter(model.id == totals.c.owner_id).update({
+            model.upcoming_shows_count: totals.c.upcoming,
+            model.past_shows_count: totals.c.past,
+        }, synchronize_session=False)
+
+
+@click.group('counters')
+def counters_command():
+    """Maintain the per-venue and per-artist show counters."""
+
+
+@counters_command.command('roll')
+@with_appcontext
+def roll_command():
+    """Count the shows that started since the last roll as past (run it from cron)."""
+    roll()
+    db.session.commit()
+
+
+@counters_command.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recount all show counters from scratch, ex: after loading shows outside the app."""
+    rebuild()
+    db.session.commit()
+    click.echo('Show counters rebuilt.')
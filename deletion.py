@@ -0,0 +1,71 @@
+import click
+from flask.cli import with_appcontext
+
+from autocomplete import autocomplete
+from cache import page_cache
+from counters import uncount_shows
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Suppression de venues / artists
+#----------------------------------------------------------------------------#
+
+# Les cles etrangeres de shows sont en ON DELETE CASCADE : Postgres supprime les shows
+# avec leur venue ou leur artiste, sans que l'ORM les charge. Une suppression, pour un id
+# ou pour mille, coute le meme nombre de requetes : verrou des lignes, ids des partenaires
+# (pages a invalider), compteurs, DELETE.
+
+OWNERS = {
+    'venue': (Venue, Show.venue_id, 'artist', Show.artist_id),
+    'artist': (Artist, Show.artist_id, 'venue', Show.venue_id),
+}
+
+
+def delete_owners(kind, ids):
+    """Delete the venues or artists in `ids` and their shows; return the ids that existed.
+
+    The caller commits, then calls forget_owners() with the result.
+    """
+    model, column, partner, partner_column = OWNERS[kind]
+    ids = sorted({int(id) for id in ids})
+    if not ids:
+        return [], []
+
+    # ======== FOR UPDATE : aucun show ne peut etre ajoute a ces lignes avant le DELETE ========
+    ids = [id for (id,) in db.session.query(model.id).filter(model.id.in_(ids)).order_by(model.id).with_for_update()]
+    if not ids:
+        return [], []
+    partner_ids = [id for (id,) in db.session.query(partner_column).filter(column.in_(ids)).distinct()]
+    uncount_shows(column.in_(ids))
+    db.session.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+    return ids, partner_ids
+
+
+def forget_owners(kind, ids, partner_ids):
+    """Drop the deleted rows from the page cache and the autocomplete index, once committed."""
+    partner = OWNERS[kind][2]
+    page_cache.invalidate(kind, *ids)
+    page_cache.invalidate(partner, *partner_ids)
+    page_cache.invalidate('facets', kind)
+    for id in ids:
+        autocomplete.remove(kind, id)
+
+
+@click.command('delete')
+@click.argument('table', type=click.Choice(['artists', 'venues']))
+@click.argument('ids', nargs=-1, required=True, type=int)
+@with_appcontext
+def delete_command(table, ids):
+    """Delete venues or artists by id, with all their shows."""
+    kind = table[:-1]
+    try:
+        deleted, partner_ids = delete_owners(kind, ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    forget_owners(kind, deleted, partner_ids)
+    missing = sorted(set(ids) - set(deleted))
+    click.echo('{} {} deleted.'.format(len(deleted), table))
+    if missing:
+        click.echo('Not found: {}'.format(', '.join(map(str, missing))))
@@ -0,0 +1,123 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+
+from models import db, Artist, Venue, Show
+
+#----------------------------------------------------------------------------#
+# Export en flux : /export/<table>.<ndjson|csv> et flask export
+#----------------------------------------------------------------------------#
+
+# Les lignes sont lues avec un curseur cote serveur (yield_per => stream_results),
+# formatees au fur et a mesure et envoyees par blocs : la memoire reste constante
+# quel que soit le nombre de lignes. Les genres sortent au format accepte par flask import.
+
+EXPORTS = {
+    'artists': Artist,
+    'venues': Venue,
+    'shows': Show,
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+
+
+def export_columns(table):
+    # Les colonnes calculees (shows.during) se deduisent des autres : flask import ne les attend pas
+    return [column.key for column in EXPORTS[table].__table__.columns if column.computed is None]
+
+
+def iter_rows(table):
+    model = EXPORTS[table]
+    columns = [getattr(model, key) for key in export_columns(table)]
+    return db.session.query(*columns).order_by(model.id).yield_per(YIELD_PER)
+
+
+def ndjson_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def csv_value(value):
+    if isinstance(value, list):
+        return ','.join(value)
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def iter_lines(table, fmt):
+    keys = export_columns(table)
+    if fmt == 'ndjson':
+        for row in iter_rows(table):
+            yield json.dumps(dict(zip(keys, [ndjson_value(value) for value in row]))) + '\n'
+    else:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def line(values):
+            writer.writerow(values)
+            text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return text
+
+        yield line(keys)
+        for row in iter_rows(table):
+            yield line([csv_value(value) for value in row])
+
+
+def iter_chunks(table, fmt, compress=False):
+    """Yield the export as byte chunks of about CHUNK_SIZE, gzipped on the fly if asked."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending, size = [], 0
+
+    def flush():
+        data = ''.join(pending).encode('utf-8')
+        pending.clear()
+        return compressor.compress(data) if compressor else data
+
+    for line in iter_lines(table, fmt):
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            size = 0
+            chunk = flush()
+            if chunk:
+                yield chunk
+
+    chunk = flush()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+
+@click.command('export')
+@click.argument('table', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='ndjson', show_default=True)
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Defaults to <table>.<format>[.gz].')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@with_appcontext
+def export_command(table, fmt, output, compress):
+    """Stream a full dump of artists, venues or shows to a file."""
+    output = output or '{}.{}{}'.format(table, fmt, '.gz' if compress else '')
+    opener = gzip.open if compress else open
+    count = 0
+    with opener(output, 'wt', encoding='utf-8', newline='') as stream:
+        for line in iter_lines(table, fmt):
+            stream.write(line)
+            count += 1
+    if fmt == 'csv':
+        count -= 1
+    click.echo('{} {} rows written to {}'.format(count, table, output))
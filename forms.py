@@ -1,7 +1,8 @@
 from datetime import datetime
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, SubmitField, TelField
-from wtforms.validators import DataRequired, URL, ValidationError
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, SubmitField, TelField, TextAreaField, IntegerField
+from wtforms.widgets import HiddenInput
+from wtforms.validators import DataRequired, Optional, URL, ValidationError
 import re
 
 state_available = [
@@ -122,13 +123,17 @@ def is_valid_id(form, id):
 
 def phone_number_validation(form, phone):
     my_validate_phone = '^[0-9]{3}-[0-9]{3}-[0-9]{4}$'
-    match = re.search(my_validate_phone, phone.data)
+    # Champ absent d'une ligne importee : data vaut None
+    match = re.search(my_validate_phone, phone.data or '')
     if not match:
         raise ValidationError(
             "Error ! Phone number must be in format xxx-xxx-xxxx"
         )
 
 
+# Formulaire, CSV ou JSON (isoformat) : avec ou sans secondes, avec un espace ou un 'T'
+datetime_formats = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M']
+
 class ShowForm(FlaskForm):
     artist_id = StringField(
         'artist_id',
@@ -141,10 +146,30 @@ class ShowForm(FlaskForm):
     start_time = DateTimeField(
         'start_time',
         validators=[DataRequired()],
+        format=datetime_formats,
         default= datetime.today()
     )
+    # Facultatif : sans fin, le show occupe seulement son heure de debut
+    end_time = DateTimeField(
+        'end_time',
+        validators=[Optional()],
+        format=datetime_formats
+    )
     submit = SubmitField("Create Show")
 
+    def validate_end_time(form, field):
+        if field.data and form.start_time.data and field.data <= form.start_time.data:
+            raise ValidationError("The show must end after it starts")
+
+# ======== Plusieurs shows d'un coup : une ligne artist_id,venue_id,start_time[,end_time] par show ========
+
+class ShowBatchForm(FlaskForm):
+    rows = TextAreaField(
+        'rows',
+        validators=[DataRequired()]
+    )
+    submit = SubmitField("Create Shows")
+
 class VenueForm(FlaskForm):
     name = StringField(
         'name', validators=[DataRequired()]
@@ -184,6 +209,8 @@ class VenueForm(FlaskForm):
     submit = SubmitField("Create Venue")
 
 class VenueEditForm(VenueForm):
+    # Version de la ligne affichee, verifiee par l'UPDATE
+    version = IntegerField(widget=HiddenInput(), validators=[DataRequired()])
     submit = SubmitField("Edit Venue")
 
 class ArtistForm(FlaskForm):
@@ -223,4 +250,5 @@ class ArtistForm(FlaskForm):
     submit = SubmitField("Create Artist")
 
 class ArtistEditForm(ArtistForm):
+    version = IntegerField(widget=HiddenInput(), validators=[DataRequired()])
     submit = SubmitField("Edit Artist")
@@ -0,0 +1,25 @@
+import multiprocessing
+import os
+
+#----------------------------------------------------------------------------#
+# gunicorn wsgi:app
+#----------------------------------------------------------------------------#
+
+bind = '0.0.0.0:{}'.format(os.environ.get('PORT', 5000))
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+# L'app est construite une fois dans le maitre ; les workers la recoivent par fork
+preload_app = True
+wsgi_app = 'wsgi:app'
+# Plusieurs workers ne peuvent pas faire tourner le meme fichier : journaux JSON sur la
+# sortie d'erreur, sauf LOG_FILE explicite (ex: logs/fyyur-{pid}.log, un fichier par worker)
+os.environ.setdefault('LOG_FILE', '')
+
+
+def post_fork(server, worker):
+    # Une connexion ouverte par le maitre avant le fork ne doit pas etre partagee :
+    # chaque worker oublie le pool herite (sans le fermer) et ouvre le sien
+    from wsgi import app
+    from models import db
+    with app.app_context():
+        for bind in [None] + list(app.config.get('SQLALCHEMY_BINDS') or {}):
+            db.get_engine(app, bind=bind).dispose(close=False)
@@ -0,0 +1,236 @@
+import csv
+import io
+import json
+from itertools import islice
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.exc import IntegrityError
+from werkzeug.datastructures import MultiDict
+
+from bookings import show_conflicts
+from cache import page_cache
+from counters import count_shows
+from forms import ArtistForm, VenueForm, ShowForm
+from models import db, Artist, Venue, Show
+
+#----------------------------------------------------------------------------#
+# Import en masse : flask import <table> <fichier>
+#----------------------------------------------------------------------------#
+
+# Le fichier (CSV ou NDJSON) est lu en flux, par paquets de --batch-size lignes.
+# Chaque ligne passe par le meme formulaire que la page de creation (genres autorises,
+# phone_number_validation, ids numeriques...), puis chaque paquet est charge avec un
+# COPY ... FROM STDIN dans sa propre transaction, avec la mise a jour des compteurs de shows.
+# La memoire ne depend que de la taille du paquet.
+
+TABLES = {
+    'artists': (ArtistForm, [
+        'name', 'city', 'state', 'phone', 'genres', 'image_link', 'facebook_link',
+        'website_link', 'seeking_venue', 'seeking_description'
+    ]),
+    'venues': (VenueForm, [
+        'name', 'city', 'state', 'address', 'phone', 'genres', 'image_link', 'facebook_link',
+        'website_link', 'seeking_talent', 'seeking_description'
+    ]),
+    'shows': (ShowForm, ['artist_id', 'venue_id', 'start_time', 'end_time']),
+}
+
+
+def read_records(stream, path):
+    if path.endswith(('.ndjson', '.jsonl')):
+        for line in stream:
+            if line.strip():
+                # Une ligne illisible est rejetee par validate_record(), l'import continue
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    yield error
+    else:
+        for record in csv.DictReader(stream):
+            yield record
+
+
+def to_formdata(record):
+    items = []
+    for key, value in record.items():
+        # En CSV les genres sont separes par des virgules : "Jazz,Blues"
+        if key == 'genres' and isinstance(value, str):
+            value = [genre.strip() for genre in value.split(',') if genre.strip()]
+        if isinstance(value, bool):
+            value = 'y' if value else ''
+        if isinstance(value, list):
+            items.extend((key, str(item)) for item in value)
+        elif value is not None:
+            items.append((key, str(value)))
+    return MultiDict(items)
+
+
+def validate_record(form_class, columns, record):
+    """Return (values, errors) for one input record, using the app's own form."""
+    if isinstance(record, ValueError):
+        return None, {'record': ['Invalid JSON: {}'.format(record)]}
+    if not isinstance(record, dict):
+        return None, {'record': ['Expected a JSON object, got {}'.format(type(record).__name__)]}
+    # data=None partout : un champ absent du fichier ne prend pas la valeur par defaut du formulaire
+    form = form_class(formdata=to_formdata(record), data=dict.fromkeys(columns), meta={'csrf': False})
+    if not form.validate():
+        return None, form.errors
+    return [form[column].data for column in columns], None
+
+
+def copy_value(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, list):
+        # Litteral tableau Postgres : {"Jazz","Rock n Roll"}
+        return '{' + ','.join(
+            '"' + item.replace('\\', '\\\\').replace('"', '\\"') + '"' for item in value
+        ) + '}'
+    return value
+
+
+def missing_references(rows, columns):
+    # ======== Une requete par table referencee et par paquet, pas une par ligne ========
+    artist_index, venue_index = columns.index('artist_id'), columns.index('venue_id')
+    artist_ids = {int(row[artist_index]) for _, row in rows}
+    venue_ids = {int(row[venue_index]) for _, row in rows}
+    known_artists = {id for (id,) in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+    known_venues = {id for (id,) in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+    db.session.rollback()
+
+    missing = {}
+    for line, row in rows:
+        errors = {}
+        if int(row[artist_index]) not in known_artists:
+            errors['artist_id'] = ['Unknown artist']
+        if int(row[venue_index]) not in known_venues:
+            errors['venue_id'] = ['Unknown venue']
+        if errors:
+            missing[line] = errors
+    return missing
+
+
+def booking_conflicts(rows, columns):
+    # ======== Une requete par paquet : chevauchements avec les shows existants et entre lignes du paquet ========
+    keys = [columns.index(column) for column in ('venue_id', 'artist_id', 'start_time', 'end_time')]
+    conflicts = show_conflicts([[row[key] for key in keys] for _, row in rows])
+    db.session.rollback()
+    return {rows[position][0]: errors for position, errors in conflicts.items()}
+
+
+def copy_rows(table, columns, rows):
+    """COPY `rows` into `table` inside the session's transaction; the caller commits."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([copy_value(value) for value in row])
+    buffer.seek(0)
+
+    # Connexion DBAPI de la session : le COPY et la mise a jour des compteurs partagent la transaction
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(table, ', '.join(columns)),
+        buffer
+    )
+
+
+def create_shows(records):
+    """Validate `records` and insert them all in one transaction, or none of them.
+
+    Each record is a dict with artist_id, venue_id, start_time and an optional
+    end_time. Returns (rows, errors): the inserted rows, and the field errors of
+    each failing record keyed by its position in `records`.
+    """
+    form_class, columns = TABLES['shows']
+    valid, errors = [], {}
+    for position, record in enumerate(records):
+        values, record_errors = validate_record(form_class, columns, record)
+        if record_errors:
+            errors[position] = record_errors
+        else:
+            valid.append((position, values))
+
+    # ======== Ids inconnus et chevauchements : une requete pour tout le lot, pas une par ligne ========
+    if valid:
+        errors.update(missing_references(valid, columns))
+        errors.update(booking_conflicts([(position, values) for position, values in valid if position not in errors], columns))
+    if errors or not valid:
+        return [], errors
+
+    rows = [dict(zip(columns, values)) for _, values in valid]
+    for row in rows:
+        row['artist_id'], row['venue_id'] = int(row['artist_id']), int(row['venue_id'])
+    try:
+        db.session.execute(Show.__table__.insert(), rows)
+        count_shows((row['venue_id'], row['artist_id'], row['start_time']) for row in rows)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # Un envoi concurrent a pris un creneau (ou supprime une venue) entre la verification et l'insertion
+        errors = missing_references(valid, columns)
+        errors.update(booking_conflicts(valid, columns))
+        if not errors:
+            raise
+        return [], errors
+    return rows, {}
+
+
+@click.command('import')
+@click.argument('table', type=click.Choice(sorted(TABLES)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per COPY transaction.')
+@click.option('--rejects', type=click.File('w'), help='Write rejected rows here as NDJSON.')
+@with_appcontext
+def import_command(table, path, batch_size, rejects):
+    """Bulk load artists, venues or shows from a CSV or NDJSON file."""
+    form_class, columns = TABLES[table]
+    loaded = rejected = 0
+
+    with open(path, newline='', encoding='utf-8') as stream:
+        records = enumerate(read_records(stream, path), start=1)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            valid, errors = [], {}
+            for line, record in batch:
+                values, record_errors = validate_record(form_class, columns, record)
+                if record_errors:
+                    errors[line] = record_errors
+                else:
+                    valid.append((line, values))
+
+            if table == 'shows' and valid:
+                missing = missing_references(valid, columns)
+                errors.update(missing)
+                valid = [(line, values) for line, values in valid if line not in missing]
+                conflicts = booking_conflicts(valid, columns)
+                errors.update(conflicts)
+                valid = [(line, values) for line, values in valid if line not in conflicts]
+
+            if valid:
+                rows = [values for _, values in valid]
+                try:
+                    copy_rows(table, columns, rows)
+                    if table == 'shows':
+                        count_shows((venue_id, artist_id, start_time) for artist_id, venue_id, start_time, _ in rows)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+                if table != 'shows':
+                    page_cache.invalidate('facets', table[:-1])
+
+            loaded += len(valid)
+            rejected += len(errors)
+            if rejects:
+                for line, record_errors in sorted(errors.items()):
+                    rejects.write(json.dumps({'line': line, 'errors': record_errors}) + '\n')
+
+            click.echo('{}: {} loaded, {} rejected'.format(table, loaded, rejected))
+
+    click.echo('Done. {} {} loaded, {} rejected.'.format(loaded, table, rejected))
@@ -0,0 +1,169 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from functools import partial
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+#----------------------------------------------------------------------------#
+# Journaux JSON, ecrits hors du thread de la requete
+#----------------------------------------------------------------------------#
+
+# app.logger met chaque enregistrement, deja formate en une ligne JSON, dans une file en
+# memoire ; un thread QueueListener par processus l'ecrit sur disque (rotation par taille
+# ou par date) : une requete n'attend jamais un write() ou une rotation. Dans une requete,
+# chaque ligne porte request_id (en-tete X-Request-ID recu ou genere, renvoye dans la
+# reponse), method, path, endpoint et duration_ms depuis le debut de la requete.
+# Sous gunicorn --preload, la file et le thread sont recrees dans chaque worker apres le fork.
+#
+# LOG_FILE = ''              : sortie d'erreur seulement (gunicorn, systemd, docker la collectent)
+# LOG_FILE = 'logs/app.log'  : fichier ; {pid} dans le nom donne un fichier par worker
+# LOG_ROTATION = 'size'      : LOG_MAX_BYTES par fichier, LOG_BACKUP_COUNT fichiers gardes
+# LOG_ROTATION = 'time'      : un fichier par periode LOG_ROTATE_WHEN ('midnight', 'H', ...)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+REQUEST_ID = re.compile(r'[\w.:-]{1,128}')
+# Attributs d'un LogRecord ordinaire : tout le reste vient de extra={...} ou de RequestFilter
+RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in RECORD_FIELDS)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestFilter(logging.Filter):
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+            if 'log_started' in g and not hasattr(record, 'duration_ms'):
+                record.duration_ms = round((time.perf_counter() - g.log_started) * 1000, 2)
+        return True
+
+
+class ProcessQueueHandler(QueueHandler):
+    """QueueHandler with one queue and listener thread per process, started on first use."""
+
+    def __init__(self, make_handlers):
+        super().__init__(None)
+        self.make_handlers = make_handlers
+        self.listener = None
+        self.pid = None
+        self._start_lock = threading.Lock()
+        # Le thread du maitre n'existe plus dans un worker forke : il en demarrera un
+        os.register_at_fork(after_in_child=self._forget_parent)
+
+    def _forget_parent(self):
+        self.listener = None
+        self.pid = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.SimpleQueue()
+            self.listener = QueueListener(self.queue, *self.make_handlers(), respect_handler_level=True)
+            self.listener.start()
+            self.pid = os.getpid()
+            # Vide la file avant la sortie du processus
+            atexit.register(self.listener.stop)
+
+    def enqueue(self, record):
+        if self.pid != os.getpid():
+            self.start()
+        self.queue.put_nowait(record)
+
+
+def log_handlers(config, debug=False):
+    """Handlers run by the listener thread; records arrive already formatted as JSON."""
+    handlers = []
+    path = config.get('LOG_FILE')
+    if path:
+        path = path.format(pid=os.getpid())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        backups = config.get('LOG_BACKUP_COUNT', 10)
+        if config.get('LOG_ROTATION', 'size') == 'time':
+            handler = TimedRotatingFileHandler(path, when=config.get('LOG_ROTATE_WHEN', 'midnight'), backupCount=backups, encoding='utf-8', delay=True)
+        else:
+            handler = RotatingFileHandler(path, maxBytes=config.get('LOG_MAX_BYTES', 10 * 1024 * 1024), backupCount=backups, encoding='utf-8', delay=True)
+        handlers.append(handler)
+    if not path or debug:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter('%(message)s'))
+    return handlers
+
+
+class JsonLogs:
+
+    def init_app(self, app):
+        self.app = app
+        handler = ProcessQueueHandler(lambda: log_handlers(app.config, app.debug))
+        handler.setFormatter(JsonFormatter())
+        handler.addFilter(RequestFilter())
+        app.logger.removeHandler(default_handler)
+        app.logger.addHandler(handler)
+        app.logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+
+    def start_request(self):
+        g.log_started = time.perf_counter()
+        # Identifiant transmis par le proxy s'il est raisonnable, sinon un nouveau
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = request_id if REQUEST_ID.fullmatch(request_id) else uuid.uuid4().hex
+
+    def finish_request(self, response):
+        if 'request_id' not in g:
+            return response
+        response.headers[REQUEST_ID_HEADER] = g.request_id
+        if not self.app.config.get('LOG_REQUESTS', True):
+            return response
+
+        # La requete peut etre terminee au moment du log : ses champs sont copies ici
+        fields = {
+            'request_id': g.request_id, 'method': request.method, 'path': request.path,
+            'endpoint': request.endpoint, 'status': response.status_code
+        }
+        log = partial(self.log_request, request.full_path.rstrip('?'), fields, g._get_current_object())
+        # ======== Corps en flux : rendu apres ce hook, duration_ms est pris a la fermeture ========
+        if response.is_streamed:
+            response.call_on_close(log)
+        else:
+            log()
+        return response
+
+    def log_request(self, full_path, fields, state):
+        self.app.logger.info(
+            '%s %s %s', fields['method'], full_path, fields['status'],
+            extra=dict(fields, sql_count=getattr(state, 'sql_count', None), duration_ms=round((time.perf_counter() - state.log_started) * 1000, 2))
+        )
+
+
+logs = JsonLogs()
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import Counter
+from functools import partial
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# Instrumentation des requetes : SQL, templates, /metrics
+#----------------------------------------------------------------------------#
+
+# Pour chaque requete HTTP on compte les instructions SQL et leur duree (evenements
+# SQLAlchemy), on mesure a part le rendu des templates, et on signale comme N+1
+# probable une meme instruction executee au moins N_PLUS_ONE_THRESHOLD fois.
+# Le detail part dans l'en-tete Server-Timing ; les histogrammes par endpoint
+# sont exposes au format texte Prometheus sur /metrics (un registre par processus).
+# Une reponse en flux (stream_page, exports) est rendue apres after_request : ses
+# en-tetes ne portent que le SQL deja fait, et les histogrammes sont mis a jour a la
+# fermeture de la reponse, rendu compris.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        for bound, count in zip(self.buckets, self.counts):
+            yield '{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, count)
+        yield '{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, self.total)
+        yield '{}_sum{{{}}} {}'.format(name, labels, self.sum)
+        yield '{}_count{{{}}} {}'.format(name, labels, self.total)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_start'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop('query_start', time.perf_counter())
+    if has_request_context() and 'sql_count' in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        g.sql_statements[statement] += 1
+
+
+def _before_render(sender, template, context, **extra):
+    if 'template_start' in g:
+        g.template_start.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    if 'template_start' in g and g.template_start:
+        g.template_time += time.perf_counter() - g.template_start.pop()
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.queries = {}
+        self.db_time = Counter()
+        self.n_plus_one = Counter()
+
+    def init_app(self, app):
+        self.app = app
+        # Sur la classe Engine : couvre aussi les engines des binds (replicas)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        before_render_template.connect(_before_render, app)
+        template_rendered.connect(_after_render, app)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.render)
+
+    def start_request(self):
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_statements = Counter()
+        g.template_start = []
+        g.template_time = 0.0
+
+    def finish_request(self, response):
+        if 'request_start' not in g:
+            return response
+        endpoint = request.endpoint or 'unknown'
+        response.headers.add('Server-Timing', 'db;dur={:.2f};desc="{} queries"'.format(g.sql_time * 1000, g.sql_count))
+
+        # ======== Corps en flux : g reste rempli pendant le rendu, lu a la fermeture ========
+        if response.is_streamed:
+            response.call_on_close(partial(self.observe, endpoint, g._get_current_object()))
+            return response
+
+        total = self.observe(endpoint, g)
+        response.headers.add('Server-Timing', 'tpl;dur={:.2f}'.format(g.template_time * 1000))
+        response.headers.add('Server-Timing', 'total;dur={:.2f}'.format(total * 1000))
+        return response
+
+    def observe(self, endpoint, state):
+        """Record one finished request from its `g` state; return its total time."""
+        total = time.perf_counter() - state.request_start
+
+        threshold = self.app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+        repeated = [(statement, count) for statement, count in state.sql_statements.items() if count >= threshold]
+        for statement, count in repeated:
+            self.app.logger.warning('Likely N+1 on %s: statement ran %d times: %s', endpoint, count, statement)
+
+        with self._lock:
+            self.latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(total)
+            self.queries.setdefault(endpoint, Histogram(QUERY_BUCKETS)).observe(state.sql_count)
+            self.db_time[endpoint] += state.sql_time
+            if repeated:
+                self.n_plus_one[endpoint] += 1
+        return total
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append('# HELP fyyur_request_duration_seconds Request latency per endpoint.')
+            lines.append('# TYPE fyyur_request_duration_seconds histogram')
+            for endpoint, histogram in sorted(self.latency.items()):
+                lines.extend(histogram.lines('fyyur_request_duration_seconds', 'endpoint="{}"'.format(endpoint)))
+
+            lines.append('# HELP fyyur_request_queries SQL statements per request.')
+            lines.append('# TYPE fyyur_request_queries histogram')
+            for endpoint, histogram in sorted(self.queries.items()):
+                lines.extend(histogram.lines('fyyur_request_queries', 'endpoint="{}"'.format(endpoint)))
+
+            lines.append('# HELP fyyur_db_seconds_total Time spent in SQL per endpoint.')
+            lines.append('# TYPE fyyur_db_seconds_total counter')
+            for endpoint, seconds in sorted(self.db_time.items()):
+                lines.append('fyyur_db_seconds_total{{endpoint="{}"}} {}'.format(endpoint, seconds))
+
+            lines.append('# HELP fyyur_n_plus_one_total Requests with a statement repeated N_PLUS_ONE_THRESHOLD times or more.')
+            lines.append('# TYPE fyyur_n_plus_one_total counter')
+            for endpoint, count in sorted(self.n_plus_one.items()):
+                lines.append('fyyur_n_plus_one_total{{endpoint="{}"}} {}'.format(endpoint, count))
+
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+metrics = Metrics()
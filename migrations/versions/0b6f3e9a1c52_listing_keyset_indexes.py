@@ -0,0 +1,28 @@
+"""Listing keyset indexes
+
+Revision ID: 0b6f3e9a1c52
+Revises: f58d20b4a6c1
+Create Date: 2026-10-18 18:12:37.502118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6f3e9a1c52'
+down_revision = 'f58d20b4a6c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Memes colonnes, dans le meme ordre, que les cles de pagination de /venues et /artists
+    # (shows (start_time, id) a deja ix_shows_start_time_id)
+    op.create_index('ix_venues_state_city_name_id', 'venues', ['state', 'city', 'name', 'id'], unique=False)
+    op.create_index('ix_artists_name_id', 'artists', ['name', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artists_name_id', table_name='artists')
+    op.drop_index('ix_venues_state_city_name_id', table_name='venues')
@@ -0,0 +1,33 @@
+"""Trigram search indexes
+
+Revision ID: 22aa229c47d9
+Revises: 30c7c2c8eba5
+Create Date: 2026-10-18 09:12:41.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '22aa229c47d9'
+down_revision = '30c7c2c8eba5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('venues', 'artists'):
+        for column in ('name', 'city', 'state'):
+            op.create_index(
+                'ix_{}_{}_trgm'.format(table, column), table, [column],
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'}
+            )
+
+
+def downgrade():
+    for table in ('venues', 'artists'):
+        for column in ('name', 'city', 'state'):
+            op.drop_index('ix_{}_{}_trgm'.format(table, column), table_name=table)
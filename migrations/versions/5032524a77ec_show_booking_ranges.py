@@ -0,0 +1,38 @@
+"""Show booking ranges
+
+Revision ID: 5032524a77ec
+Revises: c7e74386b3da
+Create Date: 2026-10-18 15:47:30.226871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5032524a77ec'
+down_revision = 'c7e74386b3da'
+branch_labels = None
+depends_on = None
+
+SHOW_RANGE = "tsrange(start_time, COALESCE(end_time, start_time), CASE WHEN end_time IS NULL THEN '[]' ELSE '[)' END)"
+
+
+def upgrade():
+    # btree_gist : l'egalite sur venue_id / artist_id dans un index GiST
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.add_column('shows', sa.Column('end_time', sa.DateTime(), nullable=True))
+    op.add_column('shows', sa.Column('during', postgresql.TSRANGE(), sa.Computed(SHOW_RANGE, persisted=True), nullable=True))
+    op.create_check_constraint('ck_shows_end_time_after_start_time', 'shows', 'end_time > start_time')
+    # Echoue si deux shows existants commencent au meme moment dans la meme venue (ou pour le meme artiste)
+    op.create_exclude_constraint('ex_shows_venue_id_during', 'shows', ('venue_id', '='), ('during', '&&'), using='gist')
+    op.create_exclude_constraint('ex_shows_artist_id_during', 'shows', ('artist_id', '='), ('during', '&&'), using='gist')
+
+
+def downgrade():
+    op.drop_constraint('ex_shows_artist_id_during', 'shows')
+    op.drop_constraint('ex_shows_venue_id_during', 'shows')
+    op.drop_constraint('ck_shows_end_time_after_start_time', 'shows', type_='check')
+    op.drop_column('shows', 'during')
+    op.drop_column('shows', 'end_time')
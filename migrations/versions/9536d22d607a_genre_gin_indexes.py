@@ -0,0 +1,26 @@
+"""Genre GIN indexes
+
+Revision ID: 9536d22d607a
+Revises: bdd1927b2c6b
+Create Date: 2026-10-18 10:21:36.042871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9536d22d607a'
+down_revision = 'bdd1927b2c6b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venues_genres', 'venues', ['genres'], unique=False, postgresql_using='gin')
+    op.create_index('ix_artists_genres', 'artists', ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_artists_genres', table_name='artists')
+    op.drop_index('ix_venues_genres', table_name='venues')
@@ -0,0 +1,45 @@
+"""Show counters
+
+Revision ID: b7ec83f66e1d
+Revises: d4e764fe4a4f
+Create Date: 2026-10-18 14:20:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7ec83f66e1d'
+down_revision = 'd4e764fe4a4f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('show_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO show_counters (id, rolled_at) VALUES (1, now())')
+
+    for table, column in (('venues', 'venue_id'), ('artists', 'artist_id')):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+        op.execute(
+            'UPDATE {table} SET upcoming_shows_count = totals.upcoming, past_shows_count = totals.past '
+            'FROM ('
+            '  SELECT {column} AS owner_id,'
+            '    count(*) FILTER (WHERE start_time >= show_counters.rolled_at) AS upcoming,'
+            '    count(*) FILTER (WHERE start_time < show_counters.rolled_at) AS past'
+            '  FROM shows, show_counters GROUP BY {column}'
+            ') AS totals WHERE {table}.id = totals.owner_id'.format(table=table, column=column)
+        )
+
+
+def downgrade():
+    for table in ('artists', 'venues'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
+    op.drop_table('show_counters')
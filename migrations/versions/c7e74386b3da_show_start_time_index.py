@@ -0,0 +1,24 @@
+"""Show start_time index
+
+Revision ID: c7e74386b3da
+Revises: b7ec83f66e1d
+Create Date: 2026-10-18 15:03:12.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e74386b3da'
+down_revision = 'b7ec83f66e1d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_shows_start_time_id', 'shows', ['start_time', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_shows_start_time_id', table_name='shows')
@@ -0,0 +1,28 @@
+"""Row updated_at
+
+Revision ID: d4e764fe4a4f
+Revises: 9536d22d607a
+Create Date: 2026-10-18 11:02:57.730114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4e764fe4a4f'
+down_revision = '9536d22d607a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('shows', 'venues', 'artists'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+        op.create_index(op.f('ix_{}_updated_at'.format(table)), table, ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('artists', 'venues', 'shows'):
+        op.drop_index(op.f('ix_{}_updated_at'.format(table)), table_name=table)
+        op.drop_column(table, 'updated_at')
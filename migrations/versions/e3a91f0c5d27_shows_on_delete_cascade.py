@@ -0,0 +1,31 @@
+"""Shows on delete cascade
+
+Revision ID: e3a91f0c5d27
+Revises: 5032524a77ec
+Create Date: 2026-10-18 16:32:08.194417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a91f0c5d27'
+down_revision = '5032524a77ec'
+branch_labels = None
+depends_on = None
+
+# Noms donnes par Postgres aux cles etrangeres creees sans nom par la premiere migration
+FOREIGN_KEYS = (('shows_artist_id_fkey', 'artists', 'artist_id'), ('shows_venue_id_fkey', 'venues', 'venue_id'))
+
+
+def upgrade():
+    for name, table, column in FOREIGN_KEYS:
+        op.drop_constraint(name, 'shows', type_='foreignkey')
+        op.create_foreign_key(name, 'shows', table, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    for name, table, column in FOREIGN_KEYS:
+        op.drop_constraint(name, 'shows', type_='foreignkey')
+        op.create_foreign_key(name, 'shows', table, [column], ['id'])
@@ -0,0 +1,26 @@
+"""Row version
+
+Revision ID: f58d20b4a6c1
+Revises: e3a91f0c5d27
+Create Date: 2026-10-18 16:58:44.730925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f58d20b4a6c1'
+down_revision = 'e3a91f0c5d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venues', 'artists'):
+        op.add_column(table, sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('artists', 'venues'):
+        op.drop_column(table, 'version')
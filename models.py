@@ -1,29 +1,67 @@
-from flask_sqlalchemy import  SQLAlchemy
-from sqlalchemy import ARRAY, String
+from routing import RoutingSQLAlchemy
+from sqlalchemy import Computed, String
+from sqlalchemy.dialects.postgresql import ARRAY, TSRANGE, ExcludeConstraint
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 
 #----------------------------------------------------------------------------#
 # Show Model
 #----------------------------------------------------------------------------#
 
+# Creneau occupe par un show : [start_time, end_time) ; sans end_time, l'instant [start_time, start_time]
+SHOW_RANGE = "tsrange(start_time, COALESCE(end_time, start_time), CASE WHEN end_time IS NULL THEN '[]' ELSE '[)' END)"
+
 class Show(db.Model):
     __tablename__ = 'shows'
+    __table_args__ = (
+        # Pages venue / artist : shows d'un proprietaire tries par date
+        db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+        # /shows : periode ?from=&to= et pagination triee par (start_time, id) ; sert aussi flask counters roll
+        db.Index('ix_shows_start_time_id', 'start_time', 'id'),
+        # Pas deux shows qui se chevauchent dans une venue ou pour un artiste (index GiST, extension btree_gist)
+        ExcludeConstraint(('venue_id', '='), ('during', '&&'), name='ex_shows_venue_id_during', using='gist'),
+        ExcludeConstraint(('artist_id', '='), ('during', '&&'), name='ex_shows_artist_id_during', using='gist'),
+        db.CheckConstraint('end_time > start_time', name='ck_shows_end_time_after_start_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, unique=True)
-    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), nullable=False)
+    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime)
+    during = db.Column(TSRANGE, Computed(SHOW_RANGE, persisted=True))
+    # Date de la derniere modification de la ligne
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now(), index=True)
 
     def __repr__(self):
         return f'<Show: id: {self.id} venue_id: {self.venue_id} artist_id: {self.artist_id} start {self.start_time}>'
 
+#============ Une seule ligne : date jusqu'a laquelle les shows sont comptes comme passes ============#
+
+class ShowCounters(db.Model):
+    __tablename__ = 'show_counters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    rolled_at = db.Column(db.DateTime, nullable=False)
+
 #----------------------------------------------------------------------------#
 # Venue Model
 #----------------------------------------------------------------------------#
 
 class Venue(db.Model):
     __tablename__ = 'venues'
+    __table_args__ = tuple(
+        # Index trigramme (pg_trgm) pour la recherche ILIKE '%terme%'
+        db.Index('ix_venues_{}_trgm'.format(column), column,
+                 postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+        for column in ('name', 'city', 'state')
+    ) + (
+        # Index GIN sur le tableau genres pour les filtres @> / &&
+        db.Index('ix_venues_genres', 'genres', postgresql_using='gin'),
+        # Ordre de la liste paginee par curseur : une page = un parcours d'index borne
+        db.Index('ix_venues_state_city_name_id', 'state', 'city', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, unique=True)
     name = db.Column(db.String, nullable=False)
@@ -37,9 +75,16 @@ class Venue(db.Model):
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String())
+    # Compteurs de shows tenus a jour par counters.py (a venir = start_time >= show_counters.rolled_at)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Version de la ligne : sert aux ETag de l'API et aux cles du cache des pages
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now(), index=True)
+    # Verrou optimiste des formulaires d'edition : incremente a chaque modification
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     #=================== Une venue a plusieurs shows =============================#
-    shows = db.relationship("Show", backref="venue", cascade="all, delete")
+    shows = db.relationship("Show", backref="venue", cascade="all, delete", passive_deletes=True)
 
     def __repr__(self):
         return f'<Venue {self.id} {self.name} {self.state} {self.address} {self.phone} {self.genres} {self.facebook_link} {self.image_link} {self.image_link} {self.seeking_talent} {self.seeking_description}>'
@@ -50,6 +95,17 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'artists'
+    __table_args__ = tuple(
+        # Index trigramme (pg_trgm) pour la recherche ILIKE '%terme%'
+        db.Index('ix_artists_{}_trgm'.format(column), column,
+                 postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+        for column in ('name', 'city', 'state')
+    ) + (
+        # Index GIN sur le tableau genres pour les filtres @> / &&
+        db.Index('ix_artists_genres', 'genres', postgresql_using='gin'),
+        # Ordre de la liste paginee par curseur : une page = un parcours d'index borne
+        db.Index('ix_artists_name_id', 'name', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True, unique=True)
     name = db.Column(db.String, nullable=False)
@@ -62,9 +118,16 @@ class Artist(db.Model):
     website_link = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String())
+    # Compteurs de shows tenus a jour par counters.py (a venir = start_time >= show_counters.rolled_at)
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Version de la ligne : sert aux ETag de l'API et aux cles du cache des pages
+    updated_at = db.Column(db.DateTime, nullable=False, server_default=db.func.now(), onupdate=db.func.now(), index=True)
+    # Verrou optimiste des formulaires d'edition : incremente a chaque modification
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
     #=================== Un artiste a plusieurs shows =============================#
-    shows = db.relationship("Show", backref="artist", cascade="all, delete")
+    shows = db.relationship("Show", backref="artist", cascade="all, delete", passive_deletes=True)
 
     def __repr__(self):
         return f'<Artist {self.id} {self.name} {self.city} {self.state} {self.phone} {self.genres} {self.image_link} {self.facebook_link} {self.website_link} {self.seeking_venue} {self.seeking_description}>'
@@ -0,0 +1,110 @@
+import dateutil.parser
+import babel
+from flask import Blueprint, Response, render_template, request, session, stream_with_context, stream_template, url_for
+from models import db
+from queries import month_bounds
+from exporter import iter_chunks, FORMATS
+
+#----------------------------------------------------------------------------#
+# Accueil, export, erreurs, et aides partagees par les vues venues / artists / shows
+#----------------------------------------------------------------------------#
+
+pages = Blueprint('pages', __name__)
+
+#----------------------------------------------------------------------------#
+# Pages de liste en flux
+#----------------------------------------------------------------------------#
+
+# Les listes lisent une page bornee (curseur, MAX_PAGE_SIZE) et seulement les colonnes
+# affichees ; le HTML part ensuite au fil du rendu au lieu d'etre assemble en memoire.
+
+def stream_page(template_name, **context):
+	# Un message flash modifie la session : le cookie doit partir avec les en-tetes, donc rendu classique
+	if session.get('_flashes'):
+		return render_template(template_name, **context)
+	return Response(stream_template(template_name, **context), mimetype='text/html')
+
+
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
+
+@pages.app_template_filter('datetime')
+def format_datetime(value, format='medium'):
+	if isinstance(value, str):
+		date = dateutil.parser.parse(value)
+	else:
+		date = value
+	if format == 'full':
+		format = "EEEE MMMM, d, y 'at' h:mma"
+	elif format == 'medium':
+		format = "EE MM, dd, y h:mma"
+	return babel.dates.format_datetime(date, format, locale='en')
+
+
+#----------------------------------------------------------------------------#
+# Calendrier et edition
+#----------------------------------------------------------------------------#
+
+def render_calendar(owner, partner, month, weeks):
+	previous, following = month_bounds(month)
+	return render_template(
+		'pages/calendar.html',
+		owner=owner,
+		partner=partner,
+		month=month,
+		weeks=weeks,
+		previous_url=url_for(request.endpoint, month=previous.strftime('%Y-%m'), **request.view_args),
+		next_url=url_for(request.endpoint, month=following.strftime('%Y-%m'), **request.view_args)
+	)
+
+
+def edited_values(form, model):
+	# Colonnes de la table presentes dans le formulaire, hors version
+	return {column: form[column].data for column in model.__table__.columns.keys() if column in form and column != 'version'}
+
+
+def update_versioned(model, id, version, values):
+	"""UPDATE ... WHERE id AND version RETURNING: the new version, or None if the row changed since `version` or is gone."""
+	table = model.__table__
+	return db.session.execute(
+		table.update()
+		.where(table.c.id == id, table.c.version == version)
+		.values(version=table.c.version + 1, **values)
+		.returning(table.c.version)
+	).scalar()
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+@pages.route('/')
+def index():
+    return render_template('pages/home.html')
+
+
+# ================================================================== #
+# --------------------------- EXPORT ---------------------------
+# ================================================================== #
+
+@pages.route('/export/<any(artists, venues, shows):table>.<any(ndjson, csv):fmt>')
+def export_table(table, fmt):
+	# ======== Flux par blocs depuis un curseur serveur, gzip a la volee si le client l'accepte ========
+	compress = 'gzip' in request.accept_encodings
+	response = Response(stream_with_context(iter_chunks(table, fmt, compress)), mimetype=FORMATS[fmt])
+	response.headers['Content-Disposition'] = 'attachment; filename={}.{}'.format(table, fmt)
+	if compress:
+		response.headers['Content-Encoding'] = 'gzip'
+	response.headers['Vary'] = 'Accept-Encoding'
+	return response
+
+
+@pages.app_errorhandler(404)
+def not_found_error(error):
+    return render_template('errors/404.html'), 404
+
+
+@pages.app_errorhandler(500)
+def server_error(error):
+    return render_template('errors/500.html'), 500
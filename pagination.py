@@ -0,0 +1,121 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, request, url_for
+from sqlalchemy import literal, tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset pagination
+#----------------------------------------------------------------------------#
+
+# Les pages sont reperees par un curseur opaque contenant la cle de tri
+# de la derniere (ou premiere) ligne affichee, ex: (name, id) ou (start_time, id).
+# On filtre avec WHERE (name, id) > (:name, :id) au lieu d'un OFFSET :
+# la page 1000 coute autant que la page 1.
+
+
+def encode_cursor(values):
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    token = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8'))
+    return token.decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, columns):
+    # ======== Un curseur invalide ou trafique renvoie simplement a la premiere page ========
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        return None
+
+    values = []
+    for column, value in zip(columns, payload):
+        python_type = column.type.python_type
+        if python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (ValueError, TypeError):
+                return None
+        elif not isinstance(value, python_type) or isinstance(value, bool):
+            return None
+        values.append(value)
+    return values
+
+
+def page_size():
+    default = current_app.config.get('PAGE_SIZE', 20)
+    cap = current_app.config.get('MAX_PAGE_SIZE', 100)
+    size = request.args.get('limit', default, type=int)
+    return max(1, min(size, cap))
+
+
+def keyset_query(query, columns, descending=False):
+    """Return (query, state): `query` limited to one page, `state` for keyset_result().
+
+    `columns` must be a unique sort key (finish with the primary key) and
+    every column must be selected by `query`. `descending` lists the rows
+    from the largest key down, ex: the most recent past shows first.
+    """
+    size = page_size()
+    after = decode_cursor(request.args.get('after'), columns)
+    before = decode_cursor(request.args.get('before'), columns) if after is None else None
+
+    # Page precedente : on lit a rebours depuis le curseur, keyset_result remet les lignes dans l'ordre
+    backwards = before is not None
+    key = tuple_(*columns)
+    cursor = before if backwards else after
+    if cursor is not None:
+        bound = tuple_(*[literal(value, column.type) for column, value in zip(columns, cursor)])
+        query = query.filter(key > bound if backwards == descending else key < bound)
+    if backwards == descending:
+        query = query.order_by(*columns)
+    else:
+        query = query.order_by(*[column.desc() for column in columns])
+
+    # ======== Une ligne de plus que la page pour savoir s'il y a une suite ========
+    state = {'columns': columns, 'size': size, 'after': after, 'before': before}
+    return query.limit(size + 1), state
+
+
+def keyset_result(rows, state, **url_args):
+    """Return (rows, pager) from the rows fetched for keyset_query().
+
+    `url_args` are carried over into the next/prev links (ex: search_term).
+    """
+    columns, size, after, before = state['columns'], state['size'], state['after'], state['before']
+    rows = list(rows)
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if before is not None:
+        rows.reverse()
+
+    if before is not None:
+        has_next, has_prev = bool(rows), has_more
+    else:
+        has_next, has_prev = has_more, after is not None and bool(rows)
+
+    # Les liens restent sur la meme route, ex: /venues/<venue_id>/shows/past
+    url_args = dict(request.view_args or {}, **url_args)
+    if 'limit' in request.args:
+        url_args['limit'] = size
+
+    def row_key(row):
+        return encode_cursor([getattr(row, column.key) for column in columns])
+
+    pager = {
+        'next': url_for(request.endpoint, after=row_key(rows[-1]), **url_args) if has_next else None,
+        'prev': url_for(request.endpoint, before=row_key(rows[0]), **url_args) if has_prev else None,
+    }
+    return rows, pager
+
+
+def keyset_page(query, columns, descending=False, **url_args):
+    """Return (rows, pager) for `query` ordered on `columns`."""
+    query, state = keyset_query(query, columns, descending)
+    return keyset_result(query.all(), state, **url_args)
@@ -0,0 +1,382 @@
+import calendar
+import json
+from datetime import date, datetime
+from itertools import groupby
+
+from flask import current_app, request, url_for
+
+from cache import page_cache
+from models import db, Venue, Artist, Show
+from pagination import keyset_page
+from search import search_filter, search_rank, listing_filters, genre_facets, show_filters
+
+#----------------------------------------------------------------------------#
+# Requetes partagees par les pages HTML et l'API JSON
+#----------------------------------------------------------------------------#
+
+
+def split_shows_query(owner_column, owner_id, other, prefix):
+    """Build the query behind split_shows(), to run on any connection (sync or async)."""
+    # ======== Un seul "now" : un show qui commence maintenant est a venir, pas perdu entre deux listes ========
+    now = datetime.now()
+    limit = current_app.config.get('SHOWS_PER_SECTION', 20)
+
+    # Les prochains shows d'un cote, les plus recents de l'autre : deux lectures bornees
+    # de l'index (owner, start_time) reunies en une requete, sans parcourir tous les shows.
+    shows = db.session.query(
+        Show.start_time,
+        other.id.label(prefix + '_id'),
+        other.name.label(prefix + '_name'),
+        other.image_link.label(prefix + '_image_link'),
+        (Show.start_time >= now).label('is_upcoming')
+    ).join(other).filter(owner_column == owner_id)
+
+    upcoming = shows.filter(Show.start_time >= now).order_by(Show.start_time).limit(limit)
+    past = shows.filter(Show.start_time < now).order_by(Show.start_time.desc()).limit(limit)
+    both = db.union_all(upcoming.subquery().select(), past.subquery().select()).subquery()
+    return db.session.query(both).order_by(both.c.start_time)
+
+
+def split_rows(rows, prefix):
+    """Shape the rows of split_shows_query() into (upcoming_shows, past_shows)."""
+    upcoming_shows, past_shows = [], []
+    for row in rows:
+        (upcoming_shows if row.is_upcoming else past_shows).append({
+            prefix + '_id': getattr(row, prefix + '_id'),
+            prefix + '_name': getattr(row, prefix + '_name'),
+            prefix + '_image_link': getattr(row, prefix + '_image_link'),
+            'start_time': row.start_time
+        })
+
+    return upcoming_shows, past_shows
+
+
+OWNER_SHOWS_KEY = [Show.start_time, Show.id]
+
+
+def owner_shows(owner_column, owner_id, other, prefix, when):
+    """Return (shows, pager): all the upcoming (soonest first) or past (latest first) shows of a venue or artist."""
+    now = datetime.now()
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        other.id.label(prefix + '_id'),
+        other.name.label(prefix + '_name'),
+        other.image_link.label(prefix + '_image_link')
+    ).join(other).filter(owner_column == owner_id)
+    query = query.filter(Show.start_time >= now if when == 'upcoming' else Show.start_time < now)
+    # Meme index (owner, start_time) que split_shows, lu page par page
+    rows, pager = keyset_page(query, OWNER_SHOWS_KEY, descending=when == 'past')
+    return [{
+        prefix + '_id': getattr(row, prefix + '_id'),
+        prefix + '_name': getattr(row, prefix + '_name'),
+        prefix + '_image_link': getattr(row, prefix + '_image_link'),
+        'start_time': row.start_time
+    } for row in rows], pager
+
+
+def split_shows(owner_column, owner_id, other, prefix):
+    """Return (upcoming_shows, past_shows) in one query.
+
+    `owner_column` is Show.venue_id or Show.artist_id, `other` the model joined
+    for the tiles (Artist on a venue page, Venue on an artist page). Each list is
+    capped to SHOWS_PER_SECTION closest shows (owner_shows() pages through all of them);
+    totals come from the owner's counters.
+    """
+    return split_rows(split_shows_query(owner_column, owner_id, other, prefix).all(), prefix)
+
+
+def genre_counts(model, state):
+    """Return [genre, count] pairs for a listing, cached until a venue or artist changes."""
+    # ======== Le GROUP BY sur unnest(genres) parcourt toute la table : calcule une fois par version ========
+    # Les creations, modifications et suppressions changent la version ('facets', kind) ;
+    # CACHE_TTL borne l'age des comptes qu'un autre worker peut servir en mode lru.
+    kind = model.__name__.lower()
+    key = 'facets:{}:{}:{}'.format(kind, state, page_cache.version('facets', kind))
+    counts = page_cache.backend.get(key)
+    if counts is None:
+        counts = json.dumps([[genre, count] for genre, count in genre_facets(db.session, model, listing_filters(model, [], state))])
+        page_cache.backend.set(key, counts)
+    return json.loads(counts)
+
+
+def listing_facets(model):
+    """Read ?genre=&state=&match= and return (criteria, facets, url_args) for a listing."""
+    genres = request.args.getlist('genre')
+    # States en majuscules, comme en base : ?state=ca filtre et partage les facettes de ?state=CA
+    state = request.args.get('state', '').upper()
+    match = request.args.get('match', 'all')
+    criteria = listing_filters(model, genres, state, match)
+
+    url_args = {'genre': genres, 'state': state or None, 'match': match if match == 'any' else None}
+
+    # Une facette ajoute (ou retire) son genre de la selection courante
+    facets = []
+    for genre, count in genre_counts(model, state):
+        selected = [g for g in genres if g != genre] if genre in genres else genres + [genre]
+        facets.append({
+            'genre': genre,
+            'count': count,
+            'active': genre in genres,
+            'url': url_for(request.endpoint, **dict(url_args, genre=selected))
+        })
+
+    return criteria, facets, url_args
+
+
+def parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_month(value):
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def show_listing_filters():
+    """Read ?from=&to=&city=&state=&genre= and return (criteria, filters, url_args) for /shows."""
+    # Une date invalide est ignoree (type= renvoie None), comme un curseur invalide
+    day_from = request.args.get('from', type=parse_day)
+    day_to = request.args.get('to', type=parse_day)
+    city = request.args.get('city', '').strip()
+    state = request.args.get('state', '')
+    genres = request.args.getlist('genre')
+    criteria = show_filters(day_from, day_to, city, state, genres)
+
+    filters = {
+        'from': day_from.isoformat() if day_from else '',
+        'to': day_to.isoformat() if day_to else '',
+        'city': city,
+        'state': state,
+        'genre': genres,
+    }
+    url_args = {key: value or None for key, value in filters.items()}
+    return criteria, filters, url_args
+
+# ================================================================== #
+# --------------------------- Listes ---------------------------
+# ================================================================== #
+
+
+def venue_areas(criteria, url_args):
+    """Return (areas, pager): one page of venues grouped by (city, state)."""
+    # ======== Une seule requete, triee par state & city, au lieu d'une requete par venue ========
+    # Pagination par curseur sur (state, city, name, id) pour garder les zones contigues
+    rows, pager = keyset_page(
+        db.session.query(Venue.id, Venue.name, Venue.city, Venue.state, Venue.upcoming_shows_count).filter(*criteria),
+        [Venue.state, Venue.city, Venue.name, Venue.id],
+        **url_args
+    )
+
+    # ============ (city, state) comme cle : deux states peuvent avoir une city du meme nom =================
+    areas = []
+    for (city, state), zone in groupby(rows, key=lambda row: (row.city, row.state)):
+        areas.append({
+            'city': city,
+            'state': state,
+            'venues': [
+                {'id': venue.id, 'name': venue.name, 'num_upcoming_shows': venue.upcoming_shows_count}
+                for venue in zone
+            ]
+        })
+    return areas, pager
+
+
+def artist_list(criteria, url_args):
+    rows, pager = keyset_page(
+        db.session.query(Artist.id, Artist.name, Artist.upcoming_shows_count).filter(*criteria),
+        [Artist.name, Artist.id],
+        **url_args
+    )
+    return [
+        {'id': artist.id, 'name': artist.name, 'num_upcoming_shows': artist.upcoming_shows_count}
+        for artist in rows
+    ], pager
+
+
+def show_list_query():
+    # ======== Une seule jointure shows/venues/artists, seulement les colonnes utilisees par le template ========
+    return db.session.query(
+        Show.id,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time
+    ).join(Venue, Show.venue_id == Venue.id)\
+        .join(Artist, Show.artist_id == Artist.id)
+
+
+SHOW_LIST_KEY = [Show.start_time, Show.id]
+
+
+def show_list_rows(rows):
+    data = []
+    for one_show in rows:
+        data.append({
+            "venue_id": one_show.venue_id,
+            "venue_name": one_show.venue_name,
+            "artist_id": one_show.artist_id,
+            "artist_name": one_show.artist_name,
+            "artist_image_link": one_show.artist_image_link,
+            "start_time": str(one_show.start_time)
+        })
+    return data
+
+
+def show_list(criteria=(), url_args=None):
+    rows, pager = keyset_page(show_list_query().filter(*criteria), SHOW_LIST_KEY, **(url_args or {}))
+    return show_list_rows(rows), pager
+
+
+def search_results(model, search_term):
+    """Return ({'count', 'data'}, pager) for a venue or artist search."""
+    # ====== << ilike >> sur index trigramme, resultats classes par pertinence
+    matches = search_filter(model, search_term)
+    rank = search_rank(model, search_term)
+    rows, pager = keyset_page(
+        db.session.query(model.id, model.name, model.upcoming_shows_count, rank).filter(matches),
+        [rank, model.name, model.id],
+        search_term=search_term
+    )
+    response = {
+        "count": db.session.query(db.func.count(model.id)).filter(matches).scalar(),
+        "data": [
+            {"id": row.id, "name": row.name, "num_upcoming_shows": row.upcoming_shows_count}
+            for row in rows
+        ]
+    }
+    return response, pager
+
+# ================================================================== #
+# --------------------------- Details ---------------------------
+# ================================================================== #
+
+
+def month_bounds(month):
+    """Return (previous, next) months of `month`, as dates on the 1st."""
+    previous = date(month.year - (month.month == 1), (month.month - 2) % 12 + 1, 1)
+    following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return previous, following
+
+
+def calendar_month(owner_column, owner_id, other, prefix, month):
+    """Return the weeks of `month` (Monday first) with the owner's shows on each day.
+
+    Reads only that month's shows, through the (owner, start_time) index.
+    """
+    start = datetime(month.year, month.month, 1)
+    end = datetime.combine(month_bounds(month)[1], datetime.min.time())
+    rows = db.session.query(
+        Show.start_time,
+        other.id.label(prefix + '_id'),
+        other.name.label(prefix + '_name')
+    ).join(other).filter(owner_column == owner_id, Show.start_time >= start, Show.start_time < end)\
+        .order_by(Show.start_time)
+
+    days = {}
+    for row in rows:
+        days.setdefault(row.start_time.date(), []).append({
+            prefix + '_id': getattr(row, prefix + '_id'),
+            prefix + '_name': getattr(row, prefix + '_name'),
+            'start_time': row.start_time
+        })
+
+    return [
+        [{'date': day, 'in_month': day.month == month.month, 'shows': days.get(day, [])} for day in week]
+        for week in calendar.Calendar().monthdatescalendar(month.year, month.month)
+    ]
+
+
+
+def venue_fields(venue, shows):
+    """Detail page data from a Venue and its split_shows() result."""
+    upcoming_shows, past_shows = shows
+
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "genres": venue.genres,
+        "website_link": venue.website_link,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description if venue.seeking_talent else '',
+        "image_link": venue.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": venue.past_shows_count,
+        "upcoming_shows_count": venue.upcoming_shows_count,
+    }
+
+
+def artist_fields(artist, shows):
+    """Detail page data from an Artist and its split_shows() result."""
+    upcoming_shows, past_shows = shows
+
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website_link": artist.website_link,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description if artist.seeking_venue else '',
+        "image_link": artist.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": artist.past_shows_count,
+        "upcoming_shows_count": artist.upcoming_shows_count,
+    }
+
+
+def venue_detail(venue):
+    return venue_fields(venue, split_shows(Show.venue_id, venue.id, Artist, 'artist'))
+
+
+def artist_detail(artist):
+    return artist_fields(artist, split_shows(Show.artist_id, artist.id, Venue, 'venue'))
+
+
+def detail_version_query(model, owner_id):
+    """Build the query behind detail_version(), to run on any connection (sync or async)."""
+    return db.session.query(
+        model.updated_at, model.version, model.upcoming_shows_count, model.past_shows_count
+    ).filter(model.id == owner_id)
+
+
+def detail_version(model, owner_id):
+    """Return the version of a detail page, or None if the row is missing.
+
+    A primary key lookup on the owner row alone. Every change the page shows
+    goes through that row: an edit bumps its version, adding, deleting or
+    rolling shows updates its counters, and editing a partner touches the
+    updated_at of the rows whose pages show it (touch_rows).
+    """
+    return detail_version_query(model, owner_id).first()
+
+
+def show_partner_ids(owner_column, owner_id, partner_column):
+    """Ids on the other side of an owner's shows, ex: artists who played a venue."""
+    return [id for (id,) in db.session.query(partner_column).filter(owner_column == owner_id).distinct()]
+
+
+def touch_rows(model, ids):
+    """Set updated_at of the rows in `ids` to now, in the current transaction; the caller commits."""
+    if ids:
+        db.session.query(model).filter(model.id.in_(ids))\
+            .update({model.updated_at: db.func.now()}, synchronize_session=False)
+
+
+def venue_version(venue_id):
+    return detail_version(Venue, venue_id)
+
+
+def artist_version(artist_id):
+    return detail_version(Artist, artist_id)
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm, text
+
+#----------------------------------------------------------------------------#
+# Routage lecture -> replicas
+#----------------------------------------------------------------------------#
+
+# Les replicas sont des binds Flask-SQLAlchemy (replica_0, replica_1, ...) construits
+# depuis SQLALCHEMY_REPLICA_URIS. Les endpoints en lecture seule (READ_ENDPOINTS et
+# l'API en GET) lisent sur un replica sain choisi au debut de la requete ; tout le reste,
+# ainsi que les requetes qui suivent une ecriture du meme client pendant
+# READ_YOUR_WRITES_SECONDS (la redirection apres un POST par exemple), reste sur le primaire.
+# Un replica qui ne repond pas (ou trop en retard) est ecarte jusqu'au prochain controle.
+
+READ_ENDPOINTS = {
+    'venues.list_venues', 'venues.show_venue', 'venues.search_venues', 'venues.venue_calendar', 'venues.venue_shows',
+    'artists.list_artists', 'artists.show_artist', 'artists.search_artists', 'artists.artist_calendar', 'artists.artist_shows',
+    'shows.list_shows', 'pages.export_table',
+}
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+
+class RoutingSession(SignallingSession):
+
+    def __init__(self, db, **options):
+        # SignallingSession ne garde pas db, necessaire pour les engines des replicas
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        bind = g.get('replica_bind') if has_request_context() else None
+        if bind is not None and not self._flushing:
+            return self.db.get_engine(self.app, bind=bind)
+        return super().get_bind(mapper, clause, **kw)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+class ReplicaRouter:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._health = {}
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or []
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', None) or {}
+        self.replicas = []
+        for index, uri in enumerate(uris):
+            key = 'replica_{}'.format(index)
+            binds[key] = uri
+            self.replicas.append(key)
+        app.config['SQLALCHEMY_BINDS'] = binds or None
+        app.before_request(self.choose_bind)
+        app.after_request(self.remember_write)
+
+    def is_read(self):
+        endpoint = request.endpoint or ''
+        return endpoint in READ_ENDPOINTS or (endpoint.startswith('api.') and request.method in SAFE_METHODS)
+
+    def choose_bind(self):
+        g.replica_bind = None
+        if not self.replicas or not self.is_read():
+            return
+        if session.get('primary_until', 0) > time.time():
+            return
+        healthy = [key for key in self.replicas if self.is_healthy(key)]
+        if healthy:
+            g.replica_bind = random.choice(healthy)
+
+    def remember_write(self, response):
+        # ======== Apres une ecriture, ce client relit sur le primaire le temps que les replicas rattrapent ========
+        if self.replicas and request.method not in SAFE_METHODS and not self.is_read():
+            session['primary_until'] = time.time() + self.app.config.get('READ_YOUR_WRITES_SECONDS', 5)
+        return response
+
+    def is_healthy(self, key):
+        now = time.monotonic()
+        with self._lock:
+            healthy, checked_at = self._health.get(key, (True, None))
+            if checked_at is not None and now - checked_at < self.app.config.get('REPLICA_HEALTH_TTL', 10):
+                return healthy
+            # Un seul thread controle a la fois, les autres gardent l'etat precedent
+            self._health[key] = (healthy, now)
+
+        healthy = self.check(key)
+        with self._lock:
+            self._health[key] = (healthy, time.monotonic())
+        return healthy
+
+    def check(self, key):
+        max_lag = self.app.config.get('REPLICA_MAX_LAG_SECONDS')
+        try:
+            with self.db.get_engine(self.app, bind=key).connect() as connection:
+                if max_lag is None:
+                    connection.execute(text('SELECT 1'))
+                    return True
+                lag = connection.execute(text(
+                    'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+                )).scalar()
+                return lag <= max_lag
+        except Exception as e:
+            self.app.logger.warning('Replica %s unavailable, reading from the primary: %s', key, e)
+            return False
+
+
+replica_router = ReplicaRouter()
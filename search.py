@@ -0,0 +1,98 @@
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import Float, and_, func
+
+from models import Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Recherche insensible a la casse (venues & artists)
+#----------------------------------------------------------------------------#
+
+# Les colonnes name, city et state ont un index GIN gin_trgm_ops (pg_trgm),
+# ILIKE '%terme%' passe donc par l'index au lieu d'un parcours complet de la table.
+# Un terme de la forme "San Francisco, CA" cherche par city & state.
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _like_pattern(term):
+    return '%' + _escape_like(term) + '%'
+
+
+def search_filter(model, search_term):
+    search_term = search_term.strip()
+    if ',' in search_term:
+        city, state = [part.strip() for part in search_term.rsplit(',', 1)]
+        return and_(
+            model.city.ilike(_like_pattern(city), escape='\\'),
+            model.state.ilike(_like_pattern(state), escape='\\')
+        )
+    return model.name.ilike(_like_pattern(search_term), escape='\\')
+
+
+def search_rank(model, search_term):
+    # ======== Pertinence : similarite trigramme, negative pour trier du plus au moins pertinent ========
+    search_term = search_term.strip()
+    if ',' in search_term:
+        city, state = [part.strip() for part in search_term.rsplit(',', 1)]
+        score = func.similarity(model.city, city, type_=Float) + func.similarity(model.state, state, type_=Float)
+    else:
+        score = func.word_similarity(search_term, model.name, type_=Float)
+    return (-score).label('rank')
+
+
+#----------------------------------------------------------------------------#
+# Filtres par genre & facettes
+#----------------------------------------------------------------------------#
+
+# genres est un ARRAY(String) indexe en GIN : @> (contains) et && (overlap)
+# passent par l'index. Plusieurs ?genre= : tous requis, ou au moins un avec ?match=any.
+
+
+def listing_filters(model, genres, state, match='all'):
+    criteria = []
+    if genres:
+        if match == 'any':
+            criteria.append(model.genres.overlap(genres))
+        else:
+            criteria.append(model.genres.contains(genres))
+    if state:
+        criteria.append(model.state == state)
+    return criteria
+
+
+def genre_facets(session, model, criteria):
+    # ======== Nombre de lignes par genre, parmi les lignes qui passent les autres filtres ========
+    genre = func.unnest(model.genres).label('genre')
+    unnested = session.query(genre).filter(*criteria).subquery()
+    return session.query(unnested.c.genre, func.count().label('count'))\
+        .group_by(unnested.c.genre)\
+        .order_by(func.count().desc(), unnested.c.genre).all()
+
+
+#----------------------------------------------------------------------------#
+# Filtres des shows : periode, lieu, genre
+#----------------------------------------------------------------------------#
+
+# La periode passe par l'index (start_time, id) des shows : seules les entrees
+# de l'intervalle sont lues, quel que soit l'historique. Lieu et genre portent sur
+# la venue et l'artiste deja joints par show_list_query().
+
+
+def show_filters(day_from, day_to, city, state, genres):
+    criteria = []
+    if day_from:
+        criteria.append(Show.start_time >= datetime.combine(day_from, time.min))
+    if day_to:
+        # ======== Date de fin incluse : jusqu'au lendemain minuit exclu ========
+        criteria.append(Show.start_time < datetime.combine(day_to + timedelta(days=1), time.min))
+    if city:
+        criteria.append(Venue.city.ilike(_escape_like(city), escape='\\'))
+    if state:
+        # Les states sont enregistres en majuscules (CA, NY...) : ?state=ca les trouve aussi
+        criteria.append(Venue.state == state.upper())
+    if genres:
+        criteria.append(Artist.genres.overlap(genres))
+    return criteria
@@ -0,0 +1,123 @@
+import csv
+from flask import Blueprint, current_app, render_template, flash, redirect, url_for
+from forms import ShowForm, ShowBatchForm, genre_available
+from models import db, Show
+from sqlalchemy.exc import IntegrityError
+from queries import show_list, show_listing_filters
+from bookings import show_conflicts, conflict_error
+from cache import page_cache
+from counters import count_shows
+# La vue du formulaire s'appelle create_shows
+from importer import create_shows as insert_shows
+from pages import stream_page
+
+shows = Blueprint('shows', __name__)
+
+# ================================================================== #
+# --------------------------- SHOW ---------------------------
+# ================================================================== #
+
+@shows.route('/shows')
+def list_shows():
+    # ======== Filtres ?from=&to=&city=&state=&genre= : "ce week-end a Austin" ========
+    criteria, filters, url_args = show_listing_filters()
+    data, pager = show_list(criteria, url_args)
+    genres = [genre for genre, _ in genre_available]
+    return stream_page('pages/shows.html', shows=data, pager=pager, filters=filters, genres=genres)
+
+
+@shows.route('/shows/create')
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+# ======== Une tournee d'un coup : toutes les lignes verifiees ensemble, inserees dans une seule transaction ========
+
+BATCH_COLUMNS = ['artist_id', 'venue_id', 'start_time', 'end_time']
+
+
+@shows.route('/shows/batch')
+def create_shows_batch():
+	form = ShowBatchForm()
+	return render_template('forms/new_shows_batch.html', form=form, line_errors=[])
+
+
+@shows.route('/shows/batch', methods=['POST'])
+def create_shows_batch_submission():
+	form = ShowBatchForm()
+	if not form.validate_on_submit():
+		flash(form.errors)
+		return render_template('forms/new_shows_batch.html', form=form, line_errors=[])
+
+	lines = [line for line in form.rows.data.splitlines() if line.strip()]
+	records = [dict(zip(BATCH_COLUMNS, [cell.strip() for cell in cells])) for cells in csv.reader(lines)]
+	rows, errors = insert_shows(records)
+	if errors:
+		line_errors = [(position + 1, lines[position], errors[position]) for position in sorted(errors)]
+		flash('No show was listed: {} of {} lines have errors.'.format(len(errors), len(lines)))
+		return render_template('forms/new_shows_batch.html', form=form, line_errors=line_errors)
+
+	page_cache.invalidate('venue', *{row['venue_id'] for row in rows})
+	page_cache.invalidate('artist', *{row['artist_id'] for row in rows})
+	flash('{} shows were successfully listed!'.format(len(rows)))
+	return redirect(url_for('pages.index'))
+
+
+@shows.route('/shows/create', methods=['POST'])
+def create_show_submission():
+	form = ShowForm()
+	if form.validate_on_submit():
+
+		# ======== Chevauchement avec un show de la venue ou de l'artiste : erreur sur le champ concerne ========
+		conflicts = show_conflicts([(form.venue_id.data, form.artist_id.data, form.start_time.data, form.end_time.data)])
+		if conflicts:
+			for field, errors in conflicts[0].items():
+				form[field].errors.extend(errors)
+			flash(form.errors)
+			return render_template('forms/new_show.html', form=form)
+
+		try:
+
+			show = Show(
+				venue_id=form.venue_id.data,
+				artist_id=form.artist_id.data,
+				start_time=form.start_time.data,
+				end_time=form.end_time.data
+			)
+
+			db.session.add(show)
+			# Deux envois simultanes passent la verification : la contrainte d'exclusion refuse le second ici
+			db.session.flush()
+			count_shows([(show.venue_id, show.artist_id, show.start_time)])
+			db.session.commit()
+			page_cache.invalidate('venue', int(form.venue_id.data))
+			page_cache.invalidate('artist', int(form.artist_id.data))
+
+			# on successful db insert, flash success
+			flash('Show was successfully listed!')
+			return redirect(url_for('pages.index'))
+		except IntegrityError as e:
+			db.session.rollback()
+			conflict = conflict_error(e)
+			if conflict:
+				field, message = conflict
+				form[field].errors.append(message)
+				flash(form.errors)
+			else:
+				flash('An error occurred. Show could not be listed.')
+				current_app.logger.exception('Show could not be listed', extra={'venue_id': form.venue_id.data, 'artist_id': form.artist_id.data})
+			return render_template('forms/new_show.html', form=form)
+		except Exception:
+			db.session.rollback()
+
+			# on unsuccessful db insert, flash an error instead.
+			flash('An error occurred. Show could not be listed.')
+			current_app.logger.exception('Show could not be listed', extra={'venue_id': form.venue_id.data, 'artist_id': form.artist_id.data})
+			return render_template('forms/new_show.html', form=form)
+		finally:
+			db.session.close()
+	else:
+		flash(form.errors)
+		return render_template('forms/new_show.html', form=form)
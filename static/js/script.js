@@ -2,3 +2,47 @@ window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
 };
+
+// Autocompletion des noms (forms/new_show.html) : <input data-autocomplete="artist|venue" data-target="<id du champ>">
+document.addEventListener('DOMContentLoaded', function () {
+  var inputs = document.querySelectorAll('input[data-autocomplete]');
+  Array.prototype.forEach.call(inputs, function (input) {
+    var list = document.getElementById(input.getAttribute('list'));
+    var target = document.getElementById(input.dataset.target);
+    var pending = null;
+
+    input.addEventListener('input', function () {
+      // Choix d'une proposition : on recopie son id dans le champ du formulaire
+      var chosen = Array.prototype.find.call(list.options, function (option) {
+        return option.value === input.value;
+      });
+      if (chosen) {
+        target.value = chosen.dataset.id;
+        return;
+      }
+
+      var query = input.value.trim();
+      if (pending) {
+        pending.abort();
+      }
+      if (!query) {
+        list.innerHTML = '';
+        return;
+      }
+      pending = new AbortController();
+      fetch('/autocomplete?type=' + input.dataset.autocomplete + '&q=' + encodeURIComponent(query), {signal: pending.signal})
+        .then(function (response) { return response.json(); })
+        .then(function (results) {
+          list.innerHTML = '';
+          results.forEach(function (result) {
+            var option = document.createElement('option');
+            option.value = result.name;
+            option.dataset.id = result.id;
+            option.textContent = '#' + result.id;
+            list.appendChild(option);
+          });
+        })
+        .catch(function () {});
+    });
+  });
+});
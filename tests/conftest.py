@@ -0,0 +1,85 @@
+import os
+import sys
+
+# Les modules de l'app sont a la racine du depot
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Avant l'import de config.py : pas de .secret_key ni de error.log ecrits par les tests
+os.environ.setdefault('SECRET_KEY', 'tests')
+os.environ.setdefault('LOG_FILE', '')
+
+import pytest
+
+#----------------------------------------------------------------------------#
+# Base de test
+#----------------------------------------------------------------------------#
+
+# Les tests qui utilisent `database` tournent sur une vraie base Postgres (contraintes
+# d'exclusion, COPY, verrous consultatifs) : TEST_DATABASE_URL, migree au debut de la session
+# et videe apres chaque test. Sans elle, ils sont ignores comme ceux de test_routing.py.
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+
+@pytest.fixture(scope='session')
+def app():
+    if not DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    from flask_migrate import upgrade
+    from app import create_app
+
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': DATABASE_URL,
+        'SQLALCHEMY_REPLICA_URIS': [],
+        'WTF_CSRF_ENABLED': False,
+        'LOG_REQUESTS': False,
+    })
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+    return app
+
+
+@pytest.fixture
+def database(app):
+    """An app context on empty venues, artists and shows tables."""
+    from models import db
+
+    with app.app_context():
+        yield db
+        db.session.rollback()
+        db.session.execute(db.text('TRUNCATE shows, venues, artists RESTART IDENTITY'))
+        db.session.execute(db.text('UPDATE show_counters SET rolled_at = now()'))
+        db.session.commit()
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app, database):
+    return app.test_client()
+
+
+@pytest.fixture
+def add_venue(database):
+    from models import Venue
+
+    def add_venue(name='The Musical Hop', **values):
+        venue = Venue(name=name, city=values.pop('city', 'San Francisco'), state=values.pop('state', 'CA'),
+                      genres=values.pop('genres', ['Jazz']), **values)
+        database.session.add(venue)
+        database.session.commit()
+        return venue.id
+    return add_venue
+
+
+@pytest.fixture
+def add_artist(database):
+    from models import Artist
+
+    def add_artist(name='Guns N Petals', **values):
+        artist = Artist(name=name, city=values.pop('city', 'San Francisco'), state=values.pop('state', 'CA'),
+                        genres=values.pop('genres', ['Rock n Roll']), **values)
+        database.session.add(artist)
+        database.session.commit()
+        return artist.id
+    return add_artist
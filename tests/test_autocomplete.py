@@ -0,0 +1,47 @@
+import pytest
+
+from autocomplete import PrefixIndex
+from models import Artist
+
+
+@pytest.fixture
+def index():
+    index = PrefixIndex(Artist)
+    index.add(1, 'Guns N Petals')
+    index.add(2, 'Matt Quevedo')
+    index.add(3, 'The Wild Sax Band')
+    index.add(4, 'The Petal Pushers')
+    return index
+
+
+def names(results):
+    return [result['name'] for result in results]
+
+
+def test_prefix_of_any_word(index):
+    assert sorted(names(index.search('pet', 10))) == ['Guns N Petals', 'The Petal Pushers']
+    assert names(index.search('sax', 10)) == ['The Wild Sax Band']
+
+
+def test_case_insensitive(index):
+    assert names(index.search('MATT', 10)) == ['Matt Quevedo']
+
+
+def test_one_result_per_row(index):
+    # "the wild sax band" et "the petal pushers" commencent par "the" : une fois chacun
+    assert sorted(result['id'] for result in index.search('the', 10)) == [3, 4]
+
+
+def test_limit(index):
+    assert len(index.search('', 2)) == 2
+
+
+def test_no_match(index):
+    assert index.search('zz', 10) == []
+
+
+def test_rename_and_remove(index):
+    index.add(2, 'Matthew Quevedo')
+    assert names(index.search('matt', 10)) == ['Matthew Quevedo']
+    index.remove(2)
+    assert index.search('matt', 10) == []
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from bookings import batch_conflicts
+
+VENUE_ERROR = {'venue_id': ['This venue already has a show at that time.']}
+ARTIST_ERROR = {'artist_id': ['This artist already has a show at that time.']}
+
+
+def at(hour, minute=0):
+    return datetime(2026, 10, 24, hour, minute)
+
+
+def test_no_overlap():
+    shows = [
+        (1, 1, at(20), at(22)),
+        (1, 2, at(22), at(23)),
+        (2, 1, at(23), None),
+    ]
+    assert batch_conflicts(shows) == {}
+
+
+def test_overlap_at_same_venue():
+    shows = [(1, 1, at(20), at(22)), (1, 2, at(21), at(23))]
+    assert batch_conflicts(shows) == {1: VENUE_ERROR}
+
+
+def test_overlap_for_same_artist():
+    shows = [(1, 1, at(20), at(22)), (2, 1, at(21, 30), None)]
+    assert batch_conflicts(shows) == {1: ARTIST_ERROR}
+
+
+def test_both_owners():
+    shows = [(1, 1, at(20), at(21)), (1, 1, at(20, 30), at(22))]
+    assert batch_conflicts(shows) == {1: dict(VENUE_ERROR, **ARTIST_ERROR)}
+
+
+def test_show_starting_later_is_reported_whatever_the_order():
+    shows = [(1, 1, at(21), at(23)), (1, 2, at(20), at(22))]
+    assert batch_conflicts(shows) == {0: VENUE_ERROR}
+
+
+def test_compared_to_the_show_ending_last():
+    # Le 3e show ne chevauche pas le 2e, mais le 1er qui finit plus tard
+    shows = [(1, 1, at(18), at(23)), (1, 2, at(19), at(20)), (1, 3, at(21), at(22))]
+    assert batch_conflicts(shows) == {1: VENUE_ERROR, 2: VENUE_ERROR}
+
+
+def test_range_bounds():
+    # [debut, fin) : un show peut commencer a la fin du precedent
+    assert batch_conflicts([(1, 1, at(20), at(22)), (1, 2, at(22), None)]) == {}
+    # Sans fin, un show est un instant [debut, debut] : un autre ne peut pas commencer au meme moment
+    assert batch_conflicts([(1, 1, at(20), None), (1, 2, at(20), at(21))]) == {1: VENUE_ERROR}
+    assert batch_conflicts([(1, 1, at(20), None), (1, 2, at(20), None)]) == {1: VENUE_ERROR}
@@ -0,0 +1,44 @@
+import cache
+from cache import LRUCache
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_get_and_set():
+    lru = LRUCache(maxsize=2, ttl=0)
+    assert lru.get('a') is None
+    lru.set('a', 'page a')
+    assert lru.get('a') == 'page a'
+
+
+def test_evicts_least_recently_used():
+    lru = LRUCache(maxsize=2, ttl=0)
+    lru.set('a', 1)
+    lru.set('b', 2)
+    # Lire 'a' le rend plus recent que 'b'
+    lru.get('a')
+    lru.set('c', 3)
+    assert lru.get('b') is None
+    assert lru.get('a') == 1
+    assert lru.get('c') == 3
+
+
+def test_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, 'monotonic', clock)
+    lru = LRUCache(maxsize=10, ttl=60)
+    lru.set('page', 'html')
+    lru.set('version', 'v1', ttl=0)
+    clock.now += 59
+    assert lru.get('page') == 'html'
+    clock.now += 2
+    assert lru.get('page') is None
+    # ttl=0 : n'expire pas
+    assert lru.get('version') == 'v1'
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from counters import LOCK_KEY, count_shows, uncount_shows, roll, rebuild
+from models import Venue, Artist, Show, ShowCounters
+
+ROLLED_AT = datetime(2026, 10, 24, 20, 0)
+
+
+def hours(n):
+    return ROLLED_AT + timedelta(hours=n)
+
+
+def add_shows(db, shows):
+    # Comme les vues : lignes et compteurs dans la meme transaction
+    db.session.add_all([Show(venue_id=venue_id, artist_id=artist_id, start_time=start_time) for venue_id, artist_id, start_time in shows])
+    count_shows(shows)
+    db.session.commit()
+
+
+def delete_shows(db, criterion):
+    uncount_shows(criterion)
+    db.session.query(Show).filter(criterion).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def counts(db):
+    return {
+        model.__tablename__: dict(
+            (id, (upcoming, past)) for id, upcoming, past in
+            db.session.query(model.id, model.upcoming_shows_count, model.past_shows_count).order_by(model.id)
+        )
+        for model in (Venue, Artist)
+    }
+
+
+def test_counts_follow_inserts_deletes_and_rolls(database, add_venue, add_artist):
+    db = database
+    db.session.query(ShowCounters).update({ShowCounters.rolled_at: ROLLED_AT})
+    db.session.commit()
+    hop, park = add_venue('The Musical Hop'), add_venue('Park Square Live Music & Coffee')
+    petals, quevedo = add_artist('Guns N Petals'), add_artist('Matt Quevedo')
+
+    add_shows(db, [
+        (hop, petals, hours(-48)),
+        (hop, quevedo, hours(-1)),
+        (park, petals, hours(0)),
+        (hop, petals, hours(1)),
+        (park, quevedo, hours(2)),
+        (park, petals, hours(72)),
+    ])
+    assert counts(db) == {
+        'venues': {hop: (1, 2), park: (3, 0)},
+        'artists': {petals: (3, 1), quevedo: (1, 1)},
+    }
+
+    # Un show passe et un show a venir de chaque cote de rolled_at
+    delete_shows(db, Show.start_time.in_([hours(-1), hours(72)]))
+    roll(hours(1) + timedelta(minutes=30))
+    db.session.commit()
+    # Ajoute apres le roll, avant le nouveau rolled_at : deja passe
+    add_shows(db, [(park, quevedo, hours(1))])
+    rolled = counts(db)
+    assert rolled == {
+        'venues': {hop: (0, 2), park: (1, 2)},
+        'artists': {petals: (0, 3), quevedo: (1, 1)},
+    }
+
+    rebuild()
+    db.session.commit()
+    assert counts(db) == rolled
+
+
+def test_roll_never_moves_back(database, add_venue, add_artist):
+    db = database
+    db.session.query(ShowCounters).update({ShowCounters.rolled_at: ROLLED_AT})
+    db.session.commit()
+    venue_id = add_venue()
+    add_shows(db, [(venue_id, add_artist(), hours(1))])
+
+    roll(hours(-24))
+    db.session.commit()
+    assert db.session.query(ShowCounters.rolled_at).scalar() == ROLLED_AT
+    assert counts(db)['venues'] == {venue_id: (1, 0)}
+
+
+def test_writers_share_the_lock_and_roll_waits_for_them(database, add_venue, add_artist):
+    db = database
+    venue_id, artist_id = add_venue(), add_artist()
+    db.session.add(Show(venue_id=venue_id, artist_id=artist_id, start_time=hours(1)))
+    count_shows([(venue_id, artist_id, hours(1))])
+
+    # Transaction d'ecriture en cours : un autre ecrivain passe, un roll attendrait
+    with db.engine.connect() as other:
+        with other.begin():
+            assert other.execute(db.text('SELECT pg_try_advisory_xact_lock_shared(:key)'), {'key': LOCK_KEY}).scalar()
+        with other.begin():
+            assert not other.execute(db.text('SELECT pg_try_advisory_xact_lock(:key)'), {'key': LOCK_KEY}).scalar()
+        db.session.commit()
+        with other.begin():
+            assert other.execute(db.text('SELECT pg_try_advisory_xact_lock(:key)'), {'key': LOCK_KEY}).scalar()
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+from autocomplete import autocomplete
+from counters import count_shows
+from models import Venue, Artist, Show
+
+PAST = datetime(2019, 5, 21, 21, 30)
+UPCOMING = datetime(2035, 4, 1, 20, 0)
+LATER = datetime(2035, 4, 1, 23, 0)
+
+
+def counters(model, id):
+    return model.query.with_entities(model.upcoming_shows_count, model.past_shows_count).filter(model.id == id).one()
+
+
+def add_show(db, venue_id, artist_id, start_time):
+    db.session.add(Show(venue_id=venue_id, artist_id=artist_id, start_time=start_time))
+    count_shows([(venue_id, artist_id, start_time)])
+    db.session.commit()
+
+
+def test_deleting_venues_cascades_to_their_shows(database, client, add_venue, add_artist):
+    db = database
+    hop, park = add_venue('The Musical Hop'), add_venue('Park Square Live Music & Coffee')
+    petals, quevedo = add_artist('Guns N Petals'), add_artist('Matt Quevedo')
+    add_show(db, hop, petals, PAST)
+    add_show(db, hop, petals, UPCOMING)
+    add_show(db, hop, quevedo, LATER)
+    add_show(db, park, quevedo, PAST)
+    autocomplete.indexes['venue'].load()
+    assert autocomplete.indexes['venue'].search('the mus', 10) == [{'id': hop, 'name': 'The Musical Hop'}]
+
+    # Page de l'artiste mise en cache avec la venue
+    assert b'The Musical Hop' in client.get('/artists/{}'.format(petals)).data
+
+    response = client.post('/api/venues/delete', json={'ids': [hop, 999]})
+    assert response.status_code == 200
+    assert response.get_json() == {'deleted': [hop], 'not_found': [999]}
+
+    db.session.remove()
+    assert Venue.query.get(hop) is None
+    assert [(show.venue_id, show.artist_id) for show in Show.query.all()] == [(park, quevedo)]
+    assert counters(Artist, petals) == (0, 0)
+    assert counters(Artist, quevedo) == (0, 1)
+    assert counters(Venue, park) == (0, 1)
+
+    assert client.get('/venues/{}'.format(hop)).status_code == 404
+    assert b'The Musical Hop' not in client.get('/artists/{}'.format(petals)).data
+    assert autocomplete.indexes['venue'].search('the mus', 10) == []
+
+
+def test_deleting_unknown_ids_changes_nothing(database, client, add_artist):
+    artist_id = add_artist()
+
+    response = client.post('/api/artists/delete', json=[998, 999])
+    assert response.get_json() == {'deleted': [], 'not_found': [998, 999]}
+    assert [artist.id for artist in Artist.query.all()] == [artist_id]
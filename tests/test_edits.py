@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from models import Venue, Artist, Show
+
+VENUE = {
+    'name': 'The Musical Hop', 'city': 'San Francisco', 'state': 'CA', 'address': '1015 Folsom Street',
+    'phone': '123-123-1234', 'genres': ['Jazz', 'Folk'], 'facebook_link': 'https://www.facebook.com/TheMusicalHop',
+}
+ARTIST = {
+    'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA', 'phone': '326-123-5000',
+    'genres': ['Rock n Roll'], 'facebook_link': 'https://www.facebook.com/GunsNPetals',
+}
+
+
+def row(db, model, id):
+    db.session.remove()
+    return model.query.get(id)
+
+
+def test_fresh_venue_edit_bumps_the_version(database, client, add_venue, add_artist):
+    venue_id = add_venue(**VENUE)
+    artist_id = add_artist()
+    database.session.add(Show(venue_id=venue_id, artist_id=artist_id, start_time=datetime(2035, 4, 1, 20, 0)))
+    database.session.commit()
+    artist_updated_at = row(database, Artist, artist_id).updated_at
+
+    response = client.post('/venues/{}/edit'.format(venue_id), data=dict(VENUE, name='The Musical Hop Annex', version=1))
+    assert response.status_code == 302
+    venue = row(database, Venue, venue_id)
+    assert (venue.name, venue.version) == ('The Musical Hop Annex', 2)
+    # La page de l'artiste affiche le nom de la venue : sa ligne est touchee
+    assert row(database, Artist, artist_id).updated_at > artist_updated_at
+
+
+def test_stale_venue_edit_is_rejected(database, client, add_venue):
+    venue_id = add_venue(**VENUE)
+    client.post('/venues/{}/edit'.format(venue_id), data=dict(VENUE, city='Oakland', version=1))
+
+    # Deuxieme formulaire affiche avant la premiere modification
+    response = client.post('/venues/{}/edit'.format(venue_id), data=dict(VENUE, name='Stale Hop', version=1))
+    assert response.status_code == 200
+    assert b'was changed by someone else in the meantime' in response.data
+    venue = row(database, Venue, venue_id)
+    assert (venue.name, venue.city, venue.version) == ('The Musical Hop', 'Oakland', 2)
+
+
+def test_stale_artist_edit_is_rejected(database, client, add_artist):
+    artist_id = add_artist(**ARTIST)
+    response = client.post('/artists/{}/edit'.format(artist_id), data=dict(ARTIST, city='Oakland', version=1))
+    assert response.status_code == 302
+    assert row(database, Artist, artist_id).version == 2
+
+    response = client.post('/artists/{}/edit'.format(artist_id), data=dict(ARTIST, name='Stale Petals', version=1))
+    assert b'was changed by someone else in the meantime' in response.data
+    artist = row(database, Artist, artist_id)
+    assert (artist.name, artist.city, artist.version) == ('Guns N Petals', 'Oakland', 2)
+
+
+def test_edit_of_a_deleted_row_is_not_found(database, client):
+    response = client.post('/artists/1/edit', data=dict(ARTIST, version=1))
+    assert response.status_code == 404
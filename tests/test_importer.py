@@ -0,0 +1,72 @@
+import json
+from datetime import datetime
+
+from models import Venue, Artist, Show
+
+VENUES_CSV = '''name,city,state,address,phone,genres,facebook_link,seeking_talent
+The Musical Hop,San Francisco,CA,1015 Folsom Street,123-123-1234,"Jazz,Folk",https://www.facebook.com/TheMusicalHop,y
+The Dueling Pianos Bar,New York,NY,335 Delancey Street,914-003-1132,Classical,https://www.facebook.com/theduelingpianos,
+Park Square Live Music & Coffee,San Francisco,CA,34 Whiskey Moore Ave,415-000-1234,"Jazz,Folk",https://www.facebook.com/ParkSquareLiveMusicAndCoffee,
+'''
+
+
+def run_import(app, *args):
+    result = app.test_cli_runner().invoke(args=['import'] + list(args))
+    assert result.exception is None, result.output
+    return result.output.splitlines()
+
+
+def test_import_venues_in_batches(app, database, tmp_path):
+    path = tmp_path / 'venues.csv'
+    path.write_text(VENUES_CSV)
+
+    output = run_import(app, 'venues', str(path), '--batch-size', '2')
+    assert output == [
+        'venues: 2 loaded, 0 rejected',
+        'venues: 3 loaded, 0 rejected',
+        'Done. 3 venues loaded, 0 rejected.',
+    ]
+    database.session.remove()
+    venues = Venue.query.order_by(Venue.id).all()
+    assert [(venue.name, venue.genres, venue.seeking_talent) for venue in venues] == [
+        ('The Musical Hop', ['Jazz', 'Folk'], True),
+        ('The Dueling Pianos Bar', ['Classical'], False),
+        ('Park Square Live Music & Coffee', ['Jazz', 'Folk'], False),
+    ]
+
+
+def test_import_rejects_bad_rows_and_loads_the_others(app, database, tmp_path):
+    path, rejects = tmp_path / 'artists.ndjson', tmp_path / 'rejects.ndjson'
+    path.write_text('\n'.join([
+        json.dumps({'name': 'Guns N Petals', 'city': 'San Francisco', 'state': 'CA', 'phone': '326-123-5000',
+                    'genres': ['Rock n Roll'], 'facebook_link': 'https://www.facebook.com/GunsNPetals'}),
+        json.dumps({'name': 'Matt Quevedo', 'city': 'New York', 'state': 'NY', 'phone': '300 400 5000',
+                    'genres': ['Jazz'], 'facebook_link': 'https://www.facebook.com/mattquevedo923251523'}),
+        '{"name": "The Wild Sax Band",',
+    ]) + '\n')
+
+    output = run_import(app, 'artists', str(path), '--rejects', str(rejects))
+    assert output == ['artists: 1 loaded, 2 rejected', 'Done. 1 artists loaded, 2 rejected.']
+    database.session.remove()
+    assert [artist.name for artist in Artist.query.all()] == ['Guns N Petals']
+    lines = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [line['line'] for line in lines] == [2, 3]
+    assert lines[0]['errors'] == {'phone': ['Error ! Phone number must be in format xxx-xxx-xxxx']}
+    assert list(lines[1]['errors']) == ['record']
+
+
+def test_import_shows_checks_references_and_counts_them(app, database, add_venue, add_artist, tmp_path):
+    venue_id, artist_id = add_venue(), add_artist()
+    path, rejects = tmp_path / 'shows.csv', tmp_path / 'rejects.ndjson'
+    path.write_text('artist_id,venue_id,start_time\n{a},{v},2035-04-01 20:00\n{a},999,2035-04-08 20:00\n{a},{v},2019-05-21 21:30\n'.format(
+        a=artist_id, v=venue_id))
+
+    output = run_import(app, 'shows', str(path), '--rejects', str(rejects))
+    assert output == ['shows: 2 loaded, 1 rejected', 'Done. 2 shows loaded, 1 rejected.']
+    assert json.loads(rejects.read_text()) == {'line': 2, 'errors': {'venue_id': ['Unknown venue']}}
+    database.session.remove()
+    assert sorted(start_time for (start_time,) in database.session.query(Show.start_time)) == [
+        datetime(2019, 5, 21, 21, 30), datetime(2035, 4, 1, 20, 0)
+    ]
+    venue = Venue.query.get(venue_id)
+    assert (venue.upcoming_shows_count, venue.past_shows_count) == (1, 1)
@@ -0,0 +1,43 @@
+import base64
+import json
+from datetime import datetime
+
+from models import Venue, Show
+from pagination import decode_cursor, encode_cursor
+
+SHOW_KEY = [Show.start_time, Show.id]
+VENUE_KEY = [Venue.state, Venue.city, Venue.name, Venue.id]
+
+
+def token(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def test_round_trip():
+    values = [datetime(2026, 10, 24, 21, 30), 42]
+    assert decode_cursor(encode_cursor(values), SHOW_KEY) == values
+    values = ['CA', 'San Francisco', 'The Musical Hop', 1]
+    assert decode_cursor(encode_cursor(values), VENUE_KEY) == values
+
+
+def test_missing_cursor():
+    assert decode_cursor(None, SHOW_KEY) is None
+    assert decode_cursor('', SHOW_KEY) is None
+
+
+def test_invalid_token():
+    assert decode_cursor('not base64 !', SHOW_KEY) is None
+    assert decode_cursor(base64.urlsafe_b64encode(b'{').decode('ascii'), SHOW_KEY) is None
+
+
+def test_wrong_shape():
+    assert decode_cursor(token({'id': 1}), SHOW_KEY) is None
+    assert decode_cursor(token(['2026-10-24T21:30:00']), SHOW_KEY) is None
+    assert decode_cursor(token(['2026-10-24T21:30:00', 1, 2]), SHOW_KEY) is None
+
+
+def test_wrong_types():
+    assert decode_cursor(token(['tomorrow', 1]), SHOW_KEY) is None
+    assert decode_cursor(token(['2026-10-24T21:30:00', '1']), SHOW_KEY) is None
+    # bool est un int en Python, mais pas un id
+    assert decode_cursor(token(['2026-10-24T21:30:00', True]), SHOW_KEY) is None
@@ -0,0 +1,12 @@
+from datetime import date
+
+from queries import month_bounds
+
+
+def test_month_bounds():
+    assert month_bounds(date(2026, 6, 1)) == (date(2026, 5, 1), date(2026, 7, 1))
+
+
+def test_month_bounds_across_years():
+    assert month_bounds(date(2026, 1, 1)) == (date(2025, 12, 1), date(2026, 2, 1))
+    assert month_bounds(date(2026, 12, 1)) == (date(2026, 11, 1), date(2027, 1, 1))
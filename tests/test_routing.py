@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+from flask import Flask, Response, g, session
+
+from routing import READ_ENDPOINTS, ReplicaRouter, RoutingSQLAlchemy
+
+#----------------------------------------------------------------------------#
+# Routage lecture -> replicas
+#----------------------------------------------------------------------------#
+
+# Les tests avec un replica sain se connectent vraiment : TEST_DATABASE_URL (primaire)
+# et TEST_REPLICA_URL (replica, ou le primaire lui-meme) doivent etre definis.
+PRIMARY_URL = os.environ.get('TEST_DATABASE_URL')
+REPLICA_URL = os.environ.get('TEST_REPLICA_URL')
+UNREACHABLE_URL = 'postgresql://fyyur@127.0.0.1:1/fyyur'
+# Un endpoint HTML en lecture seule, quel qu'il soit
+READ_ENDPOINT = min(READ_ENDPOINTS)
+
+needs_replica = pytest.mark.skipif(
+    not (PRIMARY_URL and REPLICA_URL), reason='TEST_DATABASE_URL and TEST_REPLICA_URL are not set'
+)
+
+
+def make_app(replica_url):
+    """A bare app with its own router and session, and one read, one API and one write route."""
+    app = Flask(__name__)
+    app.config.update(
+        SECRET_KEY='tests',
+        SQLALCHEMY_DATABASE_URI=PRIMARY_URL or UNREACHABLE_URL,
+        SQLALCHEMY_REPLICA_URIS=[replica_url],
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        # Controle a chaque requete : l'etat d'un test ne deborde pas sur le suivant
+        REPLICA_HEALTH_TTL=0,
+        READ_YOUR_WRITES_SECONDS=5,
+    )
+    router, db = ReplicaRouter(), RoutingSQLAlchemy()
+    router.init_app(app, db)
+    db.init_app(app)
+    app.add_url_rule('/read', READ_ENDPOINT, lambda: '')
+    app.add_url_rule('/api/read', 'api.read', lambda: '')
+    app.add_url_rule('/write', 'write', lambda: '', methods=['POST'])
+    return app, router, db
+
+
+@pytest.fixture(scope='module')
+def replica():
+    return make_app(REPLICA_URL)
+
+
+@needs_replica
+def test_read_endpoint_uses_replica(replica):
+    app, router, db = replica
+    with app.test_request_context('/read'):
+        router.choose_bind()
+        assert g.replica_bind == 'replica_0'
+        assert db.session().get_bind() is db.get_engine(app, bind='replica_0')
+
+
+@needs_replica
+def test_api_get_uses_replica(replica):
+    app, router, db = replica
+    with app.test_request_context('/api/read'):
+        router.choose_bind()
+        assert g.replica_bind == 'replica_0'
+
+
+@needs_replica
+def test_post_stays_on_primary(replica):
+    app, router, db = replica
+    with app.test_request_context('/write', method='POST'):
+        router.choose_bind()
+        assert g.replica_bind is None
+        assert db.session().get_bind() is db.get_engine(app)
+
+
+@needs_replica
+def test_read_after_write_stays_on_primary(replica):
+    app, router, db = replica
+    with app.test_request_context('/write', method='POST'):
+        router.remember_write(Response())
+        primary_until = session['primary_until']
+    assert primary_until > time.time()
+
+    with app.test_request_context('/read'):
+        session['primary_until'] = primary_until
+        router.choose_bind()
+        assert g.replica_bind is None
+
+    # Une fois READ_YOUR_WRITES_SECONDS passees, retour sur le replica
+    with app.test_request_context('/read'):
+        session['primary_until'] = time.time() - 1
+        router.choose_bind()
+        assert g.replica_bind == 'replica_0'
+
+
+def test_read_falls_back_to_primary_when_check_fails():
+    app, router, db = make_app(UNREACHABLE_URL)
+    with app.test_request_context('/read'):
+        router.choose_bind()
+        assert g.replica_bind is None
+        assert db.session().get_bind() is db.get_engine(app)
+    assert router._health['replica_0'][0] is False
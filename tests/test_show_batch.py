@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from importer import create_shows
+from models import Venue, Show
+
+
+def show(artist_id, venue_id, start_time, end_time=None):
+    return {'artist_id': artist_id, 'venue_id': venue_id, 'start_time': start_time, 'end_time': end_time}
+
+
+def start_times(db):
+    db.session.remove()
+    return sorted(start_time for (start_time,) in db.session.query(Show.start_time))
+
+
+def test_batch_is_created_and_counted(database, client, add_venue, add_artist):
+    venue_id, artist_id = add_venue(), add_artist()
+
+    response = client.post('/api/shows/batch', json={'shows': [
+        show(artist_id, venue_id, '2035-04-01T20:00', '2035-04-01T22:00'),
+        show(artist_id, venue_id, '2035-04-01T22:00'),
+        show(artist_id, venue_id, '2019-05-21 21:30'),
+    ]})
+    assert response.status_code == 201
+    assert response.get_json() == {'created': 3}
+    assert start_times(database) == [datetime(2019, 5, 21, 21, 30), datetime(2035, 4, 1, 20, 0), datetime(2035, 4, 1, 22, 0)]
+    venue = Venue.query.get(venue_id)
+    assert (venue.upcoming_shows_count, venue.past_shows_count) == (2, 1)
+
+
+def test_unknown_owner_rejects_the_whole_batch(database, client, add_venue, add_artist):
+    venue_id, artist_id = add_venue(), add_artist()
+
+    response = client.post('/api/shows/batch', json=[
+        show(artist_id, venue_id, '2035-04-01T20:00'),
+        show(999, venue_id, '2035-04-08T20:00'),
+        show(artist_id, venue_id, 'tomorrow'),
+    ])
+    assert response.status_code == 422
+    errors = response.get_json()['errors']
+    assert [error['index'] for error in errors] == [1, 2]
+    assert errors[0]['errors'] == {'artist_id': ['Unknown artist']}
+    assert list(errors[1]['errors']) == ['start_time']
+    assert start_times(database) == []
+
+
+def test_booking_conflicts_reject_the_whole_batch(database, add_venue, add_artist):
+    venue_id, artist_id, other_artist_id = add_venue(), add_artist(), add_artist('Matt Quevedo')
+    rows, errors = create_shows([show(artist_id, venue_id, '2035-04-01T20:00', '2035-04-01T23:00')])
+    assert (len(rows), errors) == (1, {})
+
+    rows, errors = create_shows([
+        show(artist_id, venue_id, '2035-04-08T20:00'),
+        # Meme venue, pendant le show deja en base
+        show(other_artist_id, venue_id, '2035-04-01T21:00'),
+        # Meme artiste, pendant la premiere ligne du lot
+        show(artist_id, venue_id, '2035-04-08T20:00', '2035-04-08T21:00'),
+    ])
+    assert rows == []
+    assert errors == {
+        1: {'venue_id': ['This venue already has a show at that time.']},
+        2: {
+            'venue_id': ['This venue already has a show at that time.'],
+            'artist_id': ['This artist already has a show at that time.'],
+        },
+    }
+    assert start_times(database) == [datetime(2035, 4, 1, 20, 0)]
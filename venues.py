@@ -0,0 +1,193 @@
+from flask import Blueprint, current_app, abort, render_template, request, flash, redirect, url_for
+from datetime import datetime as dt
+from forms import VenueForm, VenueEditForm
+from models import db, Venue, Artist, Show
+from queries import listing_facets, venue_areas, search_results, venue_detail, show_partner_ids, calendar_month, parse_month, owner_shows, venue_version, touch_rows
+from cache import page_cache
+from autocomplete import autocomplete
+from deletion import delete_owners, forget_owners
+from pages import stream_page, render_calendar, edited_values, update_versioned
+
+venues = Blueprint('venues', __name__)
+
+# ================================================================== #
+# --------------------------- VENUE ---------------------------
+# ================================================================== #
+
+# =============== Lorsqu'on visite /venues, on liste les venues par City & State =============================
+
+@venues.route('/venues')
+def list_venues():
+    criteria, facets, url_args = listing_facets(Venue)
+    data, pager = venue_areas(criteria, url_args)
+    return stream_page('pages/venues.html', areas=data, pager=pager, facets=facets)
+
+# ======== J'implemente la fonctionnalite de recherche incensive a la casse =========================
+
+@venues.route('/venues/search', methods=['GET', 'POST'])
+def search_venues():
+	# =========Je recupere ce que recherche l'utilisateur (formulaire en POST, liens de pagination en GET)
+	search_term = request.values.get('search_term', '')
+	response, pager = search_results(Venue, search_term)
+	return stream_page('pages/search_venues.html', results=response, search_term=search_term, pager=pager)
+
+# ============== Pour afficher une venue unique =====================================
+
+@venues.route('/venues/<int:venue_id>')
+def show_venue(venue_id):
+	# ======== Page servie depuis le cache tant que la venue (ou ses shows) n'a pas change ========
+	def render():
+		# ===============Prendre la premiere venue dont l'id est donnee sinon retourne << none >>
+		good_venue_id = Venue.query.get(venue_id)
+
+		if not good_venue_id:
+			abort(404)
+
+		# J'essaye de recuperer les informations par rapport aux spectacles passer et a venir d'une venue. 
+		# Etant donne la relation entre une venue et les artists, une jointure s'impose sur le modele artist pour avoir d'informations sur l(les)'artists
+		# qui a un spectacle dans le lieu
+
+		data = venue_detail(good_venue_id)
+		return render_template('pages/show_venue.html', venue=data)
+
+	return page_cache.cached('venue', venue_id, render, venue_version)
+
+# ==========ICI je vais creer une venue==================
+
+# ============== Calendrier mensuel des shows d'une venue =====================================
+
+@venues.route('/venues/<int:venue_id>/calendar')
+def venue_calendar(venue_id):
+	venue = Venue.query.get_or_404(venue_id)
+	month = request.args.get('month', type=parse_month) or dt.today().date().replace(day=1)
+	weeks = calendar_month(Show.venue_id, venue_id, Artist, 'artist', month)
+	return render_calendar({'id': venue.id, 'name': venue.name, 'kind': 'venue'}, 'artist', month, weeks)
+
+# ============== Tous les shows a venir (ou passes) d'une venue, page par page =====================================
+
+@venues.route('/venues/<int:venue_id>/shows/<any(upcoming, past):when>')
+def venue_shows(venue_id, when):
+	venue = Venue.query.get_or_404(venue_id)
+	data, pager = owner_shows(Show.venue_id, venue_id, Artist, 'artist', when)
+	owner = {'id': venue.id, 'name': venue.name, 'kind': 'venue'}
+	return stream_page('pages/owner_shows.html', owner=owner, partner='artist', when=when, shows=data, pager=pager)
+
+@venues.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+@venues.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+	form = VenueForm()
+	if form.validate_on_submit():
+		try:
+			venue = Venue(
+				name=form.name.data,
+				city=form.city.data,
+				state=form.state.data,
+				address=form.address.data,
+				phone=form.phone.data,
+				genres=form.genres.data,
+				image_link=form.image_link.data,
+				facebook_link=form.facebook_link.data,
+				seeking_description=form.seeking_description.data,
+				website_link=form.website_link.data
+			)
+
+			if form.seeking_talent.data:
+				venue.seeking_talent=True
+
+			db.session.add(venue)
+			db.session.commit()
+			autocomplete.add('venue', venue.id, venue.name)
+			page_cache.invalidate('facets', 'venue')
+
+			# on successful db insert, flash success
+			flash('Venue ' + form.name.data + ' was successfully listed!')
+			return redirect(url_for('pages.index'))
+		except Exception:
+			# on unsuccessful db insert, flash an error instead.
+			flash('An error occurred. Venue ' + form.name.data + ' could not be listed.')
+			current_app.logger.exception('Venue %s could not be listed', form.name.data)
+			db.session.rollback()
+			return render_template('forms/new_venue.html', form=form)
+		finally:
+			db.session.close()
+	else:
+		flash(form.errors)
+		return render_template('forms/new_venue.html', form=form)
+
+
+# Supprimer une venue unique
+
+@venues.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+	# TODO: Complete this endpoint for taking a venue_id, and using
+	# SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
+	venue = Venue.query.get(venue_id)
+	
+	if not venue:
+		abort(404)
+	
+	try:
+		# Les shows partent avec la venue (ON DELETE CASCADE), sans passer par la session
+		deleted, artist_ids = delete_owners('venue', [venue.id])
+		db.session.commit()
+		forget_owners('venue', deleted, artist_ids)
+	except Exception:
+		db.session.rollback()
+		current_app.logger.exception('Venue %s could not be deleted', venue_id, extra={'venue_id': venue_id})
+	finally:
+		db.session.close()
+	# BONUS CHALLENGE: Implement a button to delete a Venue on a Venue Page, have it so that
+	# clicking that button delete it from the db then redirect the user to the homepage
+	return render_template('pages/venues.html')
+
+# --------------------------Mettre a jour les informations d'une venue--------------------------------------------#
+
+@venues.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+		venue = Venue.query.filter_by(id=venue_id).first()
+
+		if not venue:
+			abort(404)
+		
+		form = VenueEditForm(obj=venue)
+		return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+@venues.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+	form = VenueEditForm()
+	if form.validate_on_submit():
+		try:
+			version = update_versioned(Venue, venue_id, form.version.data, edited_values(form, Venue))
+
+			if version is not None:
+				# Les pages des artistes affichent le nom et l'image de la venue : leur version change aussi
+				artist_ids = show_partner_ids(Show.venue_id, venue_id, Show.artist_id)
+				touch_rows(Artist, artist_ids)
+				db.session.commit()
+				page_cache.invalidate('venue', venue_id)
+				page_cache.invalidate('facets', 'venue')
+				page_cache.invalidate('artist', *artist_ids)
+				autocomplete.add('venue', venue_id, form.name.data)
+				flash('Venue ' + form.name.data + ' was successfully updated')
+				return redirect(url_for('venues.show_venue', venue_id=venue_id))
+		except Exception:
+			flash('An error occured. Venue ' + request.form['name'] + ' could not be updated!')
+			current_app.logger.exception('Venue %s could not be updated', venue_id, extra={'venue_id': venue_id})
+			db.session.rollback()
+			return render_template('forms/edit_venue.html', form=form)
+		finally:
+			db.session.close()
+
+		# Aucune ligne modifiee : la venue a ete supprimee, ou modifiee par quelqu'un d'autre depuis l'affichage du formulaire
+		venue = Venue.query.get_or_404(venue_id)
+		flash('Venue ' + venue.name + ' was changed by someone else in the meantime. Check the current values and submit again.')
+		return render_template('forms/edit_venue.html', form=VenueEditForm(obj=venue, formdata=None), venue=venue)
+			
+	else:	
+		flash(form.errors)
+		return render_template('forms/edit_venue.html', form=form)
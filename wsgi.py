@@ -0,0 +1,14 @@
+"""WSGI entry point for multi-worker serving.
+
+    pip install gunicorn
+    gunicorn wsgi:app
+
+gunicorn.conf.py preloads this module: the app is built once in the master
+process and forked into the workers, one per core by default
+(WEB_CONCURRENCY overrides it). Workers sign sessions with the same
+SECRET_KEY, so CSRF tokens and flash messages work whichever worker
+serves the next request.
+"""
+from app import create_app
+
+app = create_app()